@@ -0,0 +1,165 @@
+"""Benchmark return_parse parsers on synthetic API pages.
+
+Pages are generated deterministically by `pyshopify.mock_server.MockStore`
+for a few order densities and run through `pandas_work`,
+`customers_work` and `products_work`. Throughput is reported as table
+rows produced per second, best of `--repeat` runs, and peak memory is
+measured with tracemalloc in a separate run.
+
+`DFWork` keeps conversion plans and parsed dates between pages. Cold runs
+clear both caches first, as at the start of a pull, and are used for the
+`--min-rows-per-sec` budget. Warm runs reuse the caches of the previous
+run, as later pages of a pull that repeat the same timestamps.
+
+Examples
+--------
+    python benchmarks/bench_parse.py
+    python benchmarks/bench_parse.py --pages 40 --profile heavy
+    python benchmarks/bench_parse.py --json results.json --min-rows-per-sec 50000
+"""
+import sys
+import json
+import time
+import argparse
+import tracemalloc
+from typing import Callable, Dict, List, Tuple
+from pyshopify.mock_server import MockStore
+from pyshopify.return_parse import (DFWork, pandas_work, customers_work,
+                                    products_work)
+
+PAGE_SIZE = 250
+
+PROFILES = {
+    'light': {'line_items': (1, 1), 'refund_rate': 0.0,
+              'discount_rate': 0.0, 'variants': 1},
+    'typical': {'line_items': (1, 4), 'refund_rate': 0.1,
+                'discount_rate': 0.3, 'variants': 3},
+    'heavy': {'line_items': (5, 20), 'refund_rate': 0.5,
+              'discount_rate': 0.8, 'variants': 10},
+}
+
+PARSERS: Dict[str, Callable] = {
+    'pandas_work': pandas_work,
+    'customers_work': customers_work,
+    'products_work': lambda page: products_work(page['products']),
+}
+
+ENDPOINTS = {
+    'pandas_work': 'orders',
+    'customers_work': 'customers',
+    'products_work': 'products',
+}
+
+
+def build_pages(store: MockStore, endpoint: str, pages: int) -> List[str]:
+    """Serialized pages of endpoint, decoded fresh for every run."""
+    return [json.dumps({endpoint: [
+        store.records(endpoint, idx)
+        for idx in range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)]})
+        for page in range(pages)]
+
+
+def count_rows(result) -> int:
+    """Rows in parser result, a dataframe or dictionary of dataframes."""
+    if result is None:
+        return 0
+    if isinstance(result, dict):
+        return sum(len(df) for df in result.values() if df is not None)
+    return len(result)
+
+
+def run_once(parser: Callable, pages: List[dict]) -> int:
+    """Parse all pages, returns table rows produced."""
+    return sum(count_rows(parser(page)) for page in pages)
+
+
+def clear_caches() -> None:
+    """Drop DFWork conversion plans and parsed dates."""
+    DFWork.plans.clear()
+    DFWork.date_cache.clear()
+
+
+def best_time(parser: Callable, raw_pages: List[str], repeat: int,
+              cold: bool) -> Tuple[int, float]:
+    """Rows and best seconds of parser on pages, clearing caches if cold."""
+    best = float('inf')
+    rows = 0
+    for _ in range(repeat):
+        pages = [json.loads(raw) for raw in raw_pages]
+        if cold:
+            clear_caches()
+        start = time.perf_counter()
+        rows = run_once(parser, pages)
+        best = min(best, time.perf_counter() - start)
+    return rows, best
+
+
+def bench(parser: Callable, raw_pages: List[str], repeat: int) -> dict:
+    """Cold and warm best time, rows/sec and tracemalloc peak of parser."""
+    rows, cold = best_time(parser, raw_pages, repeat, cold=True)
+    _, warm = best_time(parser, raw_pages, repeat, cold=False)
+    pages = [json.loads(raw) for raw in raw_pages]
+    clear_caches()
+    tracemalloc.start()
+    run_once(parser, pages)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {
+        'rows': rows,
+        'seconds': cold,
+        'rows_per_sec': rows / cold if cold > 0 else 0.0,
+        'warm_seconds': warm,
+        'warm_rows_per_sec': rows / warm if warm > 0 else 0.0,
+        'peak_mb': peak / 2 ** 20,
+    }
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('--pages', type=int, default=20,
+                            help='pages of 250 records per parser')
+    arg_parser.add_argument('--repeat', type=int, default=3,
+                            help='timed runs, best is reported')
+    arg_parser.add_argument('--profile', choices=sorted(PROFILES),
+                            action='append',
+                            help='density profile, default all')
+    arg_parser.add_argument('--parser', choices=sorted(PARSERS),
+                            action='append', help='parser, default all')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--json', dest='json_out',
+                            help='write results to JSON file')
+    arg_parser.add_argument('--min-rows-per-sec', type=float, default=0,
+                            help='exit 1 if any parser is slower')
+    args = arg_parser.parse_args(argv)
+
+    records = args.pages * PAGE_SIZE
+    results = []
+    print(f"{'parser':<16}{'profile':<10}{'rows':>10}{'seconds':>10}"
+          f"{'rows/sec':>12}{'warm r/s':>12}{'peak MB':>10}")
+    for profile in args.profile or list(PROFILES):
+        store = MockStore(orders=records, customers=records,
+                          products=records, seed=args.seed,
+                          **PROFILES[profile])
+        for name in args.parser or list(PARSERS):
+            raw_pages = build_pages(store, ENDPOINTS[name], args.pages)
+            result = {'parser': name, 'profile': profile,
+                      'pages': args.pages,
+                      **bench(PARSERS[name], raw_pages, args.repeat)}
+            results.append(result)
+            print(f"{name:<16}{profile:<10}{result['rows']:>10}"
+                  f"{result['seconds']:>10.3f}{result['rows_per_sec']:>12,.0f}"
+                  f"{result['warm_rows_per_sec']:>12,.0f}"
+                  f"{result['peak_mb']:>10.1f}")
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as json_fh:
+            json.dump(results, json_fh, indent=2)
+    slow = [r for r in results if r['rows_per_sec'] < args.min_rows_per_sec]
+    for result in slow:
+        print(f"{result['parser']} {result['profile']} below budget: "
+              f"{result['rows_per_sec']:,.0f} rows/sec", file=sys.stderr)
+    return 1 if slow else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
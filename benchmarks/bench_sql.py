@@ -0,0 +1,175 @@
+"""Benchmark DBWriter.sql_merge per table and stage.
+
+Synthetic orders, customers and products pages from
+`pyshopify.mock_server.MockStore` are parsed up front and the table
+dictionaries fed to `DBWriter.sql_merge`. Time spent reflecting, arranging
+rows, loading the staging table, merging and committing is reported per
+table through the writer `stage_hook`. The data is written twice, the
+first pass inserts new rows and the second updates the same rows.
+
+Without `--config` a SQLite file in a temporary directory is used as a
+stand-in through `SQLiteWriter`, a `DBWriter` subclass defined here so
+SQLite stays out of the package, tables are created from the database
+model. To benchmark MS SQL
+or MySQL start the `docker-mssql` or `docker-mysql` container, which
+builds the database and writes the `[sql]` section of the mounted
+config.ini, then pass that file with `--config`.
+
+Examples
+--------
+    python benchmarks/bench_sql.py --pages 10
+    python benchmarks/bench_sql.py --config config.ini --profile heavy
+"""
+import sys
+import json
+import time
+import argparse
+import tempfile
+import configparser
+from collections import defaultdict
+from typing import Dict, List
+from unittest import mock
+from sqlalchemy import MetaData, Table, Column, create_engine, true
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import URL
+from pyshopify.db_model import Base
+from pyshopify.mock_server import MockStore
+from pyshopify.return_parse import pandas_work, customers_work, products_work
+from pyshopify.sql import DBWriter
+from bench_parse import PAGE_SIZE, PROFILES
+
+STAGES = ['reflect', 'arrange', 'stage', 'merge', 'commit']
+
+
+def build_batches(store: MockStore, pages: int) -> List[dict]:
+    """Parsed table dictionaries of orders, customers and products pages."""
+    batches = []
+    for page in range(pages):
+        idx = range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)
+        batches.append(pandas_work(
+            {'orders': [store.order(i) for i in idx]}))
+        batches.append({'customers': customers_work(
+            {'customers': [store.customer(i) for i in idx]})})
+        batches.append(products_work([store.product(i) for i in idx]))
+    return batches
+
+
+class SQLiteWriter(DBWriter):
+    """DBWriter on a SQLite file for local benchmarks.
+
+    Pages are staged in a temporary table and upserted with
+    INSERT ... SELECT ... ON CONFLICT DO UPDATE on the primary key.
+    Tables are created from the database model.
+    """
+    def __init__(self, database: str) -> None:
+        config = configparser.ConfigParser()
+        config.read_dict({'sql': {'connector': 'sqlite',
+                                  'database': database}})
+        engine = create_engine(URL.create('sqlite', database=database))
+        # get_engine only builds engines of supported server dialects
+        with mock.patch('pyshopify.sql.get_engine', return_value=engine):
+            super().__init__(config['sql'])
+        self.meta = MetaData()
+        Base.metadata.create_all(self.engine)
+
+    def temp_table(self, cols) -> Table:
+        """Temporary staging table of cols."""
+        new_cols = [Column(col.name, col.type) for col in cols]
+        return Table('tmp', self.tmp_meta, *new_cols, prefixes=['TEMPORARY'])
+
+    def upsert_select(self, tbl: Table, tmp: Table):
+        """Upsert all rows of tmp into tbl on the primary key."""
+        # WHERE clause resolves SQLite parsing ambiguity of ON CONFLICT
+        insert_qry = insert(tbl).from_select(
+            tmp.c.keys(), tmp.select().where(true()))
+        keys = [col.name for col in tbl.primary_key]
+        return insert_qry.on_conflict_do_update(
+            index_elements=keys,
+            set_={col: insert_qry.excluded[col] for col in tmp.c.keys()
+                  if col not in keys})
+
+
+def get_writer(config_file: str, tmp_dir: str) -> DBWriter:
+    """DBWriter from config file sql section or a SQLite stand-in."""
+    if not config_file:
+        return SQLiteWriter(f'{tmp_dir}/bench.db')
+    config = configparser.ConfigParser()
+    if not config.read(config_file):
+        raise FileNotFoundError(f"Unable to read {config_file}")
+    writer = DBWriter(config['sql'])
+    writer.engine.echo = False
+    return writer
+
+
+def run_pass(writer: DBWriter, batches: List[dict]) -> dict:
+    """Write all batches, returns stage seconds and rows per table."""
+    timings: Dict[str, Dict[str, float]] = defaultdict(
+        lambda: dict.fromkeys(STAGES, 0.0))
+    rows: Dict[str, int] = defaultdict(int)
+
+    def hook(tbl_name: str, stage: str, seconds: float) -> None:
+        timings[tbl_name][stage] += seconds
+
+    writer.stage_hook = hook
+    writer.refresh_tables()
+    start = time.perf_counter()
+    for batch in batches:
+        writer.sql_merge(batch)
+        for tbl_name, df in batch.items():
+            rows[tbl_name] += len(df) if df is not None else 0
+    total = time.perf_counter() - start
+    writer.stage_hook = None
+    return {'seconds': total,
+            'tables': {tbl: {'rows': rows[tbl], **timings[tbl]}
+                       for tbl in sorted(timings,
+                                         key=lambda t: -sum(timings[t].values()))}}
+
+
+def report(name: str, result: dict) -> None:
+    """Print stage table of a pass, slowest tables first."""
+    print(f"\n{name} pass {result['seconds']:.2f}s")
+    print(f"{'table':<18}{'rows':>8}"
+          + ''.join(f"{stage:>9}" for stage in STAGES) + f"{'total':>9}")
+    for tbl_name, stats in result['tables'].items():
+        total = sum(stats[stage] for stage in STAGES)
+        print(f"{tbl_name:<18}{stats['rows']:>8}"
+              + ''.join(f"{stats[stage]:>9.3f}" for stage in STAGES)
+              + f"{total:>9.3f}")
+
+
+def main(argv=None) -> int:
+    arg_parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    arg_parser.add_argument('--config', help='config.ini with [sql] section, '
+                                             'SQLite stand-in if omitted')
+    arg_parser.add_argument('--pages', type=int, default=10,
+                            help='pages of 250 orders, customers & products')
+    arg_parser.add_argument('--profile', choices=sorted(PROFILES),
+                            default='typical', help='order density')
+    arg_parser.add_argument('--seed', type=int, default=0)
+    arg_parser.add_argument('--json', dest='json_out',
+                            help='write results to JSON file')
+    args = arg_parser.parse_args(argv)
+
+    records = args.pages * PAGE_SIZE
+    store = MockStore(orders=records, customers=records, products=records,
+                      seed=args.seed, **PROFILES[args.profile])
+    batches = build_batches(store, args.pages)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        writer = get_writer(args.config, tmp_dir)
+        print(f"Writing {args.pages} pages of {args.profile} data "
+              f"to {writer.dialect}")
+        results = {}
+        for name in ('insert', 'update'):
+            results[name] = run_pass(writer, batches)
+            report(name, results[name])
+        writer.engine.dispose()
+
+    if args.json_out:
+        with open(args.json_out, 'w', encoding='utf-8') as json_fh:
+            json.dump({'dialect': writer.dialect, 'profile': args.profile,
+                       'pages': args.pages, **results}, json_fh, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -33,10 +33,13 @@ setuptools.setup(
         'tzdata',
         'sqlalchemy>=1.4.1, <2.0',
     ],
-    extra_requires={
+    extras_require={
         'pymysql': ['pymysql>=1.0.2'],
         'mysqldb': ['mysqlclient>=2.0.3'],
         'pyodbc': ['pyodbc>=4.0.30'],
+        'async': ['aiohttp>=3.8.1'],
+        'parquet': ['pyarrow>=6.0'],
+        'prometheus': ['prometheus_client'],
     },
     package_dir={'': 'src'},
     packages=find_packages('src', exclude=["test"]),
@@ -45,6 +48,7 @@ setuptools.setup(
         'console_scripts': [
             'shopify_cli = pyshopify.cli:cli_runner',
             'shopify_db = pyshopify.cli:build_database',
+            'shopify_mock = pyshopify.cli:mock_server',
         ],
     }
 )
@@ -1,11 +1,200 @@
 """API Call to Shopify."""
 import time
 import re
+import json
+import asyncio
+import logging
+import threading
 from configparser import SectionProxy
-from typing import Union, Tuple, Optional
+from typing import Union, Tuple, Optional, Any, Dict
 import requests
-from requests import Response
+from requests import Response, Session
+from requests.adapters import HTTPAdapter
 from requests.utils import CaseInsensitiveDict
+from pyshopify.metrics import Metrics, endpoint_name
+
+logger = logging.getLogger('pyshopify')
+try:
+    import aiohttp
+except ImportError as e:
+    logger.debug("Error importing aiohttp: %s", e)
+    aiohttp = None
+
+
+class RateLimiter:
+    """Leaky bucket rate limiter shared by all calls to one store.
+
+    The bucket fill is estimated locally and corrected from the
+    `X-Shopify-Shop-Api-Call-Limit` response header. Calls are paced to
+    stay `margin` calls under the bucket size instead of waiting on 429s.
+
+    Parameters
+    ----------
+    bucket_size: int
+        Shopify bucket size, 40 for standard and 80 for Plus stores
+    leak_rate: float
+        calls per second leaked from the bucket
+    margin: int
+        number of calls to keep free in the bucket
+    """
+    def __init__(self, bucket_size: int = 40, leak_rate: float = 2.0,
+                 margin: int = 2) -> None:
+        self.bucket_size = bucket_size
+        self.leak_rate = leak_rate
+        self.margin = margin
+        self.level: float = 0.0
+        self.paused_until: float = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _leak(self, now: float) -> None:
+        """Drain bucket for elapsed time, lock must be held."""
+        self.level = max(0.0, self.level - (now - self._last) * self.leak_rate)
+        self._last = now
+
+    def _reserve(self) -> float:
+        """Reserve a call slot and return seconds to wait before calling."""
+        with self._lock:
+            now = time.monotonic()
+            self._leak(now)
+            limit = max(1, self.bucket_size - self.margin)
+            wait = max(0.0, (self.level + 1 - limit) / self.leak_rate,
+                       self.paused_until - now)
+            self.level += 1
+            return wait
+
+    def acquire(self) -> None:
+        """Block until a call can be made."""
+        wait = self._reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+    async def acquire_async(self) -> None:
+        """Wait asynchronously until a call can be made."""
+        wait = self._reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+
+    def update(self, hdr: Optional[CaseInsensitiveDict]) -> None:
+        """Correct bucket fill from Shopify call limit header."""
+        if hdr is None:
+            return
+        call_limit = hdr.get('X-Shopify-Shop-Api-Call-Limit')
+        if call_limit is None:
+            return
+        try:
+            used, size = (int(x) for x in call_limit.split('/'))
+        except ValueError:
+            return
+        with self._lock:
+            self._leak(time.monotonic())
+            self.bucket_size = size
+            self.level = max(self.level, float(used))
+
+    def penalize(self, retry_after: float) -> None:
+        """Mark bucket full and pause all calls after a 429."""
+        with self._lock:
+            now = time.monotonic()
+            self._leak(now)
+            self.level = float(self.bucket_size)
+            self.paused_until = max(self.paused_until, now + retry_after)
+
+
+_limiters: Dict[str, RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(shop_conf: SectionProxy) -> RateLimiter:
+    """Get rate limiter shared by all calls to the configured store."""
+    store = shop_conf.get('store_name', '')
+    with _limiters_lock:
+        if store not in _limiters:
+            _limiters[store] = RateLimiter(
+                bucket_size=shop_conf.getint('bucket_size', 40),
+                leak_rate=shop_conf.getfloat('leak_rate', 2.0),
+                margin=shop_conf.getint('bucket_margin', 2))
+        return _limiters[store]
+
+
+class ShopifyClient:
+    """Pooled keep-alive HTTP session for Shopify API calls.
+
+    Parameters
+    ----------
+    shop_conf: SectionProxy
+        shopify configuration section, `pool_size` sets the number of
+        pooled connections and `timeout` sets the request timeout.
+    """
+    def __init__(self, shop_conf: SectionProxy) -> None:
+        self.pool_size: int = shop_conf.getint('pool_size', 10)
+        self.timeout: int = shop_conf.getint('timeout', 30)
+        self.session: Session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size,
+                              pool_maxsize=self.pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+
+    def get(self, url: str, headers: dict,
+            params: Optional[dict] = None) -> Response:
+        """GET request through pooled session."""
+        return self.session.get(url=url, headers=headers, params=params,
+                                timeout=self.timeout)
+
+    def close(self) -> None:
+        """Close pooled connections."""
+        self.session.close()
+
+
+class AsyncShopifyClient:
+    """Pooled aiohttp session for asynchronous Shopify API calls.
+
+    The session is created on first use so it is bound to the running
+    event loop. Requires the optional aiohttp dependency.
+
+    Parameters
+    ----------
+    shop_conf: SectionProxy
+        shopify configuration section, `pool_size` sets the connection
+        limit and `timeout` sets the request timeout.
+    """
+    def __init__(self, shop_conf: SectionProxy) -> None:
+        if aiohttp is None:
+            raise ImportError("aiohttp is required for async API calls")
+        self.pool_size: int = shop_conf.getint('pool_size', 10)
+        self.timeout: int = shop_conf.getint('timeout', 30)
+        self._session: Optional[Any] = None
+
+    @property
+    def session(self) -> Any:
+        """Get or create aiohttp ClientSession."""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'Accept-Encoding': 'gzip, deflate'})
+        return self._session
+
+    async def get(self, url: str, headers: dict, params: Optional[dict] = None
+                  ) -> Tuple[int, CaseInsensitiveDict, Optional[dict], int]:
+        """GET request returning status, headers, JSON body and body size."""
+        async with self.session.get(url, headers=headers,
+                                    params=params) as resp:
+            hdr = CaseInsensitiveDict(resp.headers)
+            if resp.status != 200:
+                return resp.status, hdr, None, 0
+            raw = await resp.read()
+            return resp.status, hdr, json.loads(raw), len(raw)
+
+    async def close(self) -> None:
+        """Close pooled connections."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
 
 
 def header_link(hdr: CaseInsensitiveDict) -> Tuple[Optional[str], int]:
@@ -24,24 +213,101 @@ def header_link(hdr: CaseInsensitiveDict) -> Tuple[Optional[str], int]:
 
 
 def api_call(next_url: str, shop_conf: SectionProxy,
-             init_params: dict = None, page: bool = True
+             init_params: dict = None, page: bool = True,
+             client: Optional[ShopifyClient] = None,
+             metrics: Optional[Metrics] = None, tags: Optional[dict] = None
              ) -> Union[Response, None]:
-    """Call Shopify API."""
+    """Call Shopify API, reusing pooled connections if client is passed.
+
+    Latency, body size, throttling and bucket fill of each call are sent to
+    `metrics` tagged with the endpoint and any extra `tags`. Raises
+    `requests.HTTPError` if calls are still throttled after 10 attempts.
+    """
     shop_hdr = {'Content-Type': 'application/json',
                 'X-Shopify-Access-Token': shop_conf.get('access_token')}
+    params = init_params if not page else None
+    limiter = get_limiter(shop_conf)
     max_calls = 10
     call_num = 0
+    if metrics is not None and metrics.enabled:
+        tags = {**(tags or {}), 'endpoint': endpoint_name(next_url)}
+    else:
+        metrics = None
     while call_num < max_calls:
         call_num += 1
-        if not page:
-            resp = requests.get(url=next_url, headers=shop_hdr,
-                                params=init_params, timeout=30)
+        limiter.acquire()
+        start = time.perf_counter()
+        if client is not None:
+            resp = client.get(next_url, shop_hdr, params=params)
         else:
-            resp = requests.get(url=next_url, headers=shop_hdr, timeout=30)
+            resp = requests.get(url=next_url, headers=shop_hdr,
+                                params=params, timeout=30)
+        limiter.update(resp.headers)
+        if metrics is not None:
+            call_metrics(metrics, limiter, time.perf_counter() - start,
+                         resp.status_code, len(resp.content), tags)
         if resp.status_code == 429:
             retry = resp.headers.get('Retry-After', 2)
-            time.sleep(int(retry) * call_num)
+            limiter.penalize(float(retry))
+            continue
         resp.raise_for_status()
         if resp.status_code == 200:
             return resp
+    if resp.status_code == 429:
+        raise requests.HTTPError(
+            f"429 Too Many Requests after {max_calls} calls for url: "
+            f"{next_url}", response=resp)
     return None
+
+
+async def async_api_call(next_url: str, shop_conf: SectionProxy,
+                         client: AsyncShopifyClient,
+                         init_params: dict = None, page: bool = True,
+                         metrics: Optional[Metrics] = None,
+                         tags: Optional[dict] = None
+                         ) -> Optional[Tuple[dict, CaseInsensitiveDict]]:
+    """Call Shopify API asynchronously, returns JSON body and headers.
+
+    Raises `requests.HTTPError` if calls are still throttled after 10
+    attempts.
+    """
+    shop_hdr = {'Content-Type': 'application/json',
+                'X-Shopify-Access-Token': shop_conf.get('access_token')}
+    params = init_params if not page else None
+    limiter = get_limiter(shop_conf)
+    max_calls = 10
+    call_num = 0
+    if metrics is not None and metrics.enabled:
+        tags = {**(tags or {}), 'endpoint': endpoint_name(next_url)}
+    else:
+        metrics = None
+    while call_num < max_calls:
+        call_num += 1
+        await limiter.acquire_async()
+        start = time.perf_counter()
+        status, hdr, body, size = await client.get(next_url, shop_hdr,
+                                                   params=params)
+        limiter.update(hdr)
+        if metrics is not None:
+            call_metrics(metrics, limiter, time.perf_counter() - start,
+                         status, size, tags)
+        if status == 429:
+            retry = hdr.get('Retry-After', 2)
+            limiter.penalize(float(retry))
+            continue
+        if status != 200:
+            raise requests.HTTPError(f"{status} Error for url: {next_url}")
+        return body, hdr
+    raise requests.HTTPError(
+        f"429 Too Many Requests after {max_calls} calls for url: {next_url}")
+
+
+def call_metrics(metrics: Metrics, limiter: RateLimiter, seconds: float,
+                 status: int, size: int, tags: Dict[str, Any]) -> None:
+    """Emit latency, body size, throttling and bucket fill of an API call."""
+    metrics.emit('http_seconds', seconds, status=status, **tags)
+    metrics.emit('http_bytes', size, **tags)
+    if status == 429:
+        metrics.emit('http_throttled', 1, **tags)
+    metrics.emit('bucket_fill', limiter.level / max(limiter.bucket_size, 1),
+                 **tags)
@@ -0,0 +1,252 @@
+"""Record and replay Shopify API responses."""
+import json
+import time
+import random
+import asyncio
+import hashlib
+import logging
+import pathlib
+from configparser import SectionProxy
+from typing import Optional, Tuple, Union
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from requests import Response
+from requests.utils import CaseInsensitiveDict
+from pyshopify.api import ShopifyClient, AsyncShopifyClient
+
+logger = logging.getLogger('pyshopify')
+
+RECORD_HEADERS = ['link', 'X-Shopify-Shop-Api-Call-Limit', 'Retry-After',
+                  'Content-Type']
+
+
+def cassette_key(url: str, params: Optional[dict] = None) -> str:
+    """Key of a request from the URL path and sorted query parameters.
+
+    The host is ignored so recordings can be replayed for any store name.
+    """
+    parts = urlsplit(url)
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if params is not None:
+        query.extend((str(k), str(v)) for k, v in params.items())
+    request = parts.path + '?' + urlencode(sorted(query))
+    return hashlib.sha1(request.encode('utf-8')).hexdigest()
+
+
+def cassette_path(cassette_dir: str) -> pathlib.Path:
+    """Get absolute cassette directory, relative paths use cwd."""
+    path_obj = pathlib.Path(cassette_dir)
+    if not path_obj.is_absolute():
+        path_obj = pathlib.Path.cwd().joinpath(cassette_dir)
+    return path_obj
+
+
+def save_record(cassette_dir: pathlib.Path, url: str, params: Optional[dict],
+                status: int, headers, body: str) -> None:
+    """Write response to `<key>.json` in the cassette directory."""
+    record = {
+        'url': url,
+        'params': params,
+        'status': status,
+        'headers': {k: headers[k] for k in RECORD_HEADERS if k in headers},
+        'body': body,
+    }
+    key = cassette_key(url, params)
+    with open(cassette_dir.joinpath(key + '.json'), 'w',
+              encoding='utf-8') as rec_fh:
+        json.dump(record, rec_fh)
+
+
+class RecordingClient(ShopifyClient):
+    """Shopify client that saves every response to a cassette directory.
+
+    Each response is stored as `<key>.json` with the status, pagination
+    and rate limit headers and the raw body. Request headers, including
+    the access token, are not recorded.
+
+    Parameters
+    ----------
+    shop_conf: SectionProxy
+        shopify configuration section
+    cassette_dir: str
+        directory to write recorded responses to
+    """
+    def __init__(self, shop_conf: SectionProxy, cassette_dir: str) -> None:
+        super().__init__(shop_conf)
+        self.cassette_dir = cassette_path(cassette_dir)
+        self.cassette_dir.mkdir(parents=True, exist_ok=True)
+
+    def get(self, url: str, headers: dict,
+            params: Optional[dict] = None) -> Response:
+        """GET request, recording the response."""
+        resp = super().get(url, headers, params=params)
+        save_record(self.cassette_dir, url, params, resp.status_code,
+                    resp.headers, resp.text)
+        return resp
+
+
+class AsyncRecordingClient(AsyncShopifyClient):
+    """Asynchronous counterpart of `RecordingClient`.
+
+    Parameters
+    ----------
+    shop_conf: SectionProxy
+        shopify configuration section
+    cassette_dir: str
+        directory to write recorded responses to
+    """
+    def __init__(self, shop_conf: SectionProxy, cassette_dir: str) -> None:
+        super().__init__(shop_conf)
+        self.cassette_dir = cassette_path(cassette_dir)
+        self.cassette_dir.mkdir(parents=True, exist_ok=True)
+
+    async def get(self, url: str, headers: dict, params: Optional[dict] = None
+                  ) -> Tuple[int, CaseInsensitiveDict, Optional[dict], int]:
+        """GET request recording the response, returns status, headers,
+        JSON body and body size."""
+        async with self.session.get(url, headers=headers,
+                                    params=params) as resp:
+            status = resp.status
+            hdr = CaseInsensitiveDict(resp.headers)
+            raw = await resp.read()
+        save_record(self.cassette_dir, url, params, status, hdr,
+                    raw.decode('utf-8'))
+        if status != 200:
+            return status, hdr, None, 0
+        return status, hdr, json.loads(raw), len(raw)
+
+
+class ReplayClient:
+    """Serve recorded responses from a cassette directory.
+
+    Drop-in replacement for `ShopifyClient` that never opens a connection.
+    A fixed latency can be added to every call and a share of calls can be
+    answered with 429 responses to exercise rate limit handling.
+
+    Parameters
+    ----------
+    cassette_dir: str
+        directory of recorded responses
+    latency: float
+        seconds to wait before each response
+    rate_429: float
+        fraction of calls, 0 to 1, answered with a 429
+    retry_after: float
+        Retry-After header of simulated 429 responses
+    seed: int, optional
+        random seed for simulated 429 responses
+
+    Examples
+    --------
+    >>> app.client = ReplayClient('cassettes/orders', latency=0.2)
+    >>> orders = app.get_full_orders_df()
+    """
+    def __init__(self, cassette_dir: str, latency: float = 0.0,
+                 rate_429: float = 0.0, retry_after: float = 1.0,
+                 seed: Optional[int] = None) -> None:
+        self.cassette_dir = cassette_path(cassette_dir)
+        if not self.cassette_dir.is_dir():
+            raise FileNotFoundError(
+                f"Cassette directory {self.cassette_dir} does not exist")
+        self.latency = latency
+        self.rate_429 = rate_429
+        self.retry_after = retry_after
+        self.random = random.Random(seed)
+
+    def _load(self, url: str, params: Optional[dict] = None
+              ) -> Tuple[int, CaseInsensitiveDict, str]:
+        """Get status, headers and body of recorded or throttled call."""
+        if self.rate_429 > 0 and self.random.random() < self.rate_429:
+            return 429, CaseInsensitiveDict(
+                {'Retry-After': str(self.retry_after)}), ''
+        key = cassette_key(url, params)
+        rec_file = self.cassette_dir.joinpath(key + '.json')
+        if not rec_file.is_file():
+            raise FileNotFoundError(
+                f"No recorded response for {url} with params {params}")
+        with open(rec_file, 'r', encoding='utf-8') as rec_fh:
+            record = json.load(rec_fh)
+        return (record['status'], CaseInsensitiveDict(record['headers']),
+                record['body'])
+
+    def get(self, url: str, headers: dict,
+            params: Optional[dict] = None) -> Response:
+        """Replay GET request as a requests Response."""
+        if self.latency > 0:
+            time.sleep(self.latency)
+        status, hdr, body = self._load(url, params)
+        resp = Response()
+        resp.status_code = status
+        resp.headers = hdr
+        resp.url = url
+        resp.encoding = 'utf-8'
+        resp._content = body.encode('utf-8')  # pylint: disable=protected-access
+        return resp
+
+    def close(self) -> None:
+        """Nothing to close."""
+
+
+class AsyncReplayClient(ReplayClient):
+    """Asynchronous counterpart of `ReplayClient`."""
+    async def get(self, url: str, headers: dict,  # type: ignore[override]
+                  params: Optional[dict] = None
+                  ) -> Tuple[int, CaseInsensitiveDict, Optional[dict], int]:
+        """Replay GET request returning status, headers, JSON body and size."""
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        status, hdr, body = self._load(url, params)
+        if status != 200:
+            return status, hdr, None, 0
+        return status, hdr, json.loads(body), len(body.encode('utf-8'))
+
+    async def close(self) -> None:  # type: ignore[override]
+        """Nothing to close."""
+
+
+def build_client(shop_conf: SectionProxy
+                 ) -> Union[ShopifyClient, ReplayClient]:
+    """Build API client from `cassette` and `cassette_mode` settings.
+
+    `cassette_mode = record` saves responses to the `cassette` directory,
+    `replay` serves them back with `replay_latency` seconds of delay and
+    `replay_429_rate` of calls throttled. Any other mode uses the network.
+    """
+    mode = shop_conf.get('cassette_mode', '').lower()
+    cassette_dir = shop_conf.get('cassette')
+    if mode in ('record', 'replay') and not cassette_dir:
+        raise ValueError("Set cassette directory to record or replay")
+    if mode == 'record':
+        logger.debug("Recording API responses to %s", cassette_dir)
+        return RecordingClient(shop_conf, cassette_dir)
+    if mode == 'replay':
+        logger.debug("Replaying API responses from %s", cassette_dir)
+        return ReplayClient(cassette_dir, **replay_args(shop_conf))
+    return ShopifyClient(shop_conf)
+
+
+def build_async_client(shop_conf: SectionProxy
+                       ) -> Union[AsyncShopifyClient, AsyncReplayClient]:
+    """Build asynchronous API client, recording or replaying as configured
+    by `cassette` and `cassette_mode` like `build_client`."""
+    mode = shop_conf.get('cassette_mode', '').lower()
+    cassette_dir = shop_conf.get('cassette')
+    if mode in ('record', 'replay') and not cassette_dir:
+        raise ValueError("Set cassette directory to record or replay")
+    if mode == 'record':
+        logger.debug("Recording API responses to %s", cassette_dir)
+        return AsyncRecordingClient(shop_conf, cassette_dir)
+    if mode == 'replay':
+        logger.debug("Replaying API responses from %s", cassette_dir)
+        return AsyncReplayClient(cassette_dir, **replay_args(shop_conf))
+    return AsyncShopifyClient(shop_conf)
+
+
+def replay_args(shop_conf: SectionProxy) -> dict:
+    """Replay client arguments from shopify configuration."""
+    seed = shop_conf.get('replay_seed')
+    return {
+        'latency': shop_conf.getfloat('replay_latency', 0.0),
+        'rate_429': shop_conf.getfloat('replay_429_rate', 0.0),
+        'retry_after': shop_conf.getfloat('replay_retry_after', 1.0),
+        'seed': int(seed) if seed else None,
+    }
@@ -3,6 +3,7 @@ import sys
 import click
 from pyshopify.runner import ShopifyApp
 from pyshopify.sql import DBFactory
+from pyshopify.mock_server import MockShopifyServer, MockStore
 
 
 @click.command()
@@ -15,10 +16,14 @@ from pyshopify.sql import DBFactory
 @click.option('-b', '--between', 'btw', nargs=2, type=str,
               help=('get between 2 dates - yyyy-MM-dd,'
                     'ex -b 2020-01-01 2020-01-02'))
+@click.option('--incremental', is_flag=True,
+              help='Only get data updated since the last complete run')
 @click.option('--sql-out/--no-sql', default=False,
               help='write to database - Default False')
 @click.option('--csv-out/--no-csv', default=False,
               help='Write results to csv files - Default true')
+@click.option('--parquet-out/--no-parquet', default=False,
+              help='Write results to parquet files - Default False')
 @click.option('--csv-location',
               help=('Relative folder of csv export folder'
                     'defaults to csv_export/'))
@@ -26,7 +31,8 @@ from pyshopify.sql import DBFactory
               help=('Relative location of config.ini - defaults'
                     'to config.ini in currect directory'))
 def cli_runner(all_, orders, products, customers,
-               days, btw, sql_out, csv_out, csv_location, config):
+               days, btw, incremental, sql_out, csv_out, parquet_out,
+               csv_location, config):
     """Run Shopify App CLI.
 
     Use -d or --days to get days of history, default 7
@@ -35,8 +41,8 @@ def cli_runner(all_, orders, products, customers,
     --config is the relative or absolute location of config.ini
     """
     log = sys.stdout.write
-    if csv_out is False and sql_out is False:
-        log('Select CSV or SQL output with --csv or --sql')
+    if csv_out is False and sql_out is False and parquet_out is False:
+        log('Select CSV, SQL or Parquet output with --csv, --sql or --parquet')
         return
     config_dict = {
         'shopify': {},
@@ -45,6 +51,8 @@ def cli_runner(all_, orders, products, customers,
     }
     if csv_location:
         config_dict['csv']['filepath'] = csv_location
+    if incremental:
+        config_dict['shopify']['incremental'] = 'True'
     if btw:
         if len(btw) != 2:
             log('Please enter only 2 dates with between option')
@@ -73,14 +81,20 @@ def cli_runner(all_, orders, products, customers,
         if sql_out:
             app.write_all_to_sql()
             click.echo("All data written to DB")
+        if parquet_out:
+            app.write_all_to_parquet()
+            click.echo('Parquet Export Complete')
     elif customers:
-        app.customers_writer(write_csv=csv_out, write_sql=sql_out)
+        app.customers_writer(write_csv=csv_out, write_sql=sql_out,
+                             write_parquet=parquet_out)
         click.echo('Customers data written')
     elif orders:
-        app.orders_writer(write_csv=csv_out, write_sql=sql_out)
+        app.orders_writer(write_csv=csv_out, write_sql=sql_out,
+                          write_parquet=parquet_out)
         click.echo('Orders data written')
     elif products:
-        app.products_inventory_writer(write_csv=csv_out, write_sql=sql_out)
+        app.products_inventory_writer(write_csv=csv_out, write_sql=sql_out,
+                                      write_parquet=parquet_out)
         click.echo('Products data written')
 
 
@@ -158,5 +172,47 @@ def build_database(connector, db_tables, server, port, sa_user, sa_pass,
         click.echo("Date Dimension created")
 
 
+@click.command()
+@click.option('--host', type=str, default='127.0.0.1',
+              help='Interface to listen on')
+@click.option('-p', '--port', type=int, default=8080, help='Port to listen on')
+@click.option('--orders', type=int, default=10000,
+              help='Number of synthetic orders')
+@click.option('--customers', type=int, default=2000,
+              help='Number of synthetic customers')
+@click.option('--products', type=int, default=500,
+              help='Number of synthetic products')
+@click.option('--locations', type=int, default=3,
+              help='Number of inventory locations')
+@click.option('--start', type=str, default='2022-01-01',
+              help='Date of first order YYYY-MM-DD')
+@click.option('--end', type=str, default='2022-12-31',
+              help='Date of last order YYYY-MM-DD')
+@click.option('--bucket-size', type=int, default=40,
+              help='API call bucket size, 0 disables 429 responses')
+@click.option('--leak-rate', type=float, default=2.0,
+              help='API calls leaked from the bucket per second')
+@click.option('--latency', type=float, default=0.0,
+              help='Seconds added to each response')
+def mock_server(host, port, orders, customers, products, locations, start,
+                end, bucket_size, leak_rate, latency):
+    """Local mock Shopify Admin API for load testing.
+
+    Set shop_url in the shopify configuration to the printed URL.
+    """
+    store = MockStore(orders=orders, customers=customers, products=products,
+                      locations=locations, start=start, end=end)
+    server = MockShopifyServer(store, host=host, port=port,
+                               bucket_size=bucket_size, leak_rate=leak_rate,
+                               latency=latency)
+    click.echo(f'Mock Shopify API listening on {server.url}')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        click.echo('Stopping mock server')
+    finally:
+        server.server_close()
+
+
 if __name__ == "__main__":
     cli_runner()
@@ -36,19 +36,50 @@ class Config:
                 'items_per_page': 250,
                 'days': 7,
                 'admin_ep': '/admin/api/',
+                'api_path': '/admin/api/',
+                'api_version': '2022-07',
                 'customers_ep': 'customers.json',
                 'orders_ep': 'orders.json',
                 'version': '2022-07',
                 'time_zone': 'America/New_York',
+                'pool_size': 10,
+                'timeout': 30,
+                'bucket_size': 40,
+                'leak_rate': 2.0,
+                'bucket_margin': 2,
+                'incremental': False,
+                'state_file': 'sync_state.json',
+                'pipeline': False,
+                'pipeline_depth': 4,
+                'parse_workers': 0,
+                'cassette_mode': 'off',
+                'replay_latency': 0.0,
+                'replay_429_rate': 0.0,
             },
             'sql': {
                 'windows_auth': False,
                 'db': 'shop_rest',
-                'server': 'localhost'
+                'server': 'localhost',
+                'fast_executemany': False,
+                'chunk_size': 10000,
+                'mysql_staging': True,
+                'batch_pages': 1,
+                'batch_rows': 0,
             },
             'csv': {
                 'filepath': 'csv_export',
             },
+            'parquet': {
+                'filepath': 'parquet_export',
+                'compression': 'snappy',
+            },
+            'metrics': {
+                'exporter': 'none',
+                'prefix': 'pyshopify',
+                'statsd_host': 'localhost',
+                'statsd_port': 8125,
+                'prometheus_port': 0,
+            },
         }
 
         if conf == '':
@@ -93,3 +124,13 @@ class Config:
     def csv_conf(self) -> SectionProxy:
         """CSV Configuration Section."""
         return self.parser['csv']
+
+    @property
+    def parquet_conf(self) -> SectionProxy:
+        """Parquet Configuration Section."""
+        return self.parser['parquet']
+
+    @property
+    def metrics_conf(self) -> SectionProxy:
+        """Metrics Configuration Section."""
+        return self.parser['metrics']
@@ -1,7 +1,8 @@
 """Create folder with export in CSV files."""
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Dict, IO, Set
 from configparser import SectionProxy
+from pandas import DataFrame
 
 
 def csv_path(csv_dir: str) -> Path:
@@ -12,6 +13,83 @@ def csv_path(csv_dir: str) -> Path:
     return base
 
 
+class CSVSink:
+    """Stateful CSV writer that keeps table files open across pages.
+
+    Each table file is opened once, the header is written only when the
+    file is new or overwritten and writes are buffered until `close`.
+
+    Arguments
+    ----------
+    csv_config: configparser.SectionProxy
+        csv configuration section
+    file_operation: Optional[str], defaults to None
+        If None, write or append based on file existence,
+        other options are 'a' for append, 'w' for overwrite
+    buffer_size: int, defaults to 1MB
+        Write buffer size of each open file
+
+    Examples
+    --------
+    >>> with CSVSink(csv_config, 'w') as sink:
+    ...     for table_dict in app.orders_iterator():
+    ...         sink.write(table_dict)
+    """
+    def __init__(self, csv_config: SectionProxy,
+                 file_operation: Optional[str] = None,
+                 buffer_size: int = 1024 * 1024) -> None:
+        if file_operation not in [None, 'a', 'w']:
+            raise ValueError("file_operation must be None, 'a' or 'w'")
+        self.write_path = csv_path(csv_config.get('filepath'))
+        self.file_operation = file_operation
+        self.buffer_size = buffer_size
+        self.files: Dict[str, IO[str]] = {}
+        # Tables opened new or overwritten, header not yet written
+        self.headers: Set[str] = set()
+
+    def _open(self, table: str) -> IO[str]:
+        """Open table file on first write, noting if it needs a header."""
+        file_path = self.write_path.joinpath(table + ".csv")
+        mode = 'w' if self.file_operation == 'w' else 'a'
+        if mode == 'w' or not file_path.is_file() \
+                or file_path.stat().st_size == 0:
+            self.headers.add(table)
+        csv_file = open(file_path, mode, encoding='utf-8-sig', newline='',
+                        buffering=self.buffer_size)
+        self.files[table] = csv_file
+        return csv_file
+
+    def write(self, table_dict: Dict[str, DataFrame]) -> None:
+        """Write a page of table dataframes to their CSV files."""
+        for table, df in table_dict.items():
+            if df is None:
+                continue
+            csv_file = self.files.get(table)
+            if csv_file is None:
+                csv_file = self._open(table)
+            header = table in self.headers
+            self.headers.discard(table)
+            df.to_csv(csv_file, header=header, index=False)
+
+    def flush(self) -> None:
+        """Flush buffered writes to disk."""
+        for csv_file in self.files.values():
+            csv_file.flush()
+
+    def close(self) -> None:
+        """Flush and close all open files."""
+        for csv_file in self.files.values():
+            csv_file.close()
+        self.files = {}
+        self.headers = set()
+
+    def __enter__(self) -> 'CSVSink':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
 def csv_send(table_dict: dict, csv_config: SectionProxy,
              file_operation: Optional[str] = None) -> None:
     """Write CSV with data from table_dict
@@ -26,18 +104,9 @@ def csv_send(table_dict: dict, csv_config: SectionProxy,
         If None, write or append based on file existence,
         other options are 'a' for append, 'w' for overwrite
 
+    See Also
+    --------
+    CSVSink to keep files open when writing many pages
     """
-    write_path = csv_path(csv_config.get('filepath'))
-    for keys in table_dict.keys():
-        file_path = write_path.joinpath(keys + ".csv")
-        df = table_dict[keys]
-        if file_operation is None:
-            if file_path.is_file() is True:
-                df.to_csv(file_path, mode='a', header=True,
-                          index=False, encoding='utf-8-sig')
-            else:
-                df.to_csv(file_path, mode='w', header=True,
-                          index=False, encoding='utf-8-sig')
-        elif file_operation in ['a', 'w']:
-            df.to_csv(file_path, mode=file_operation, header=True,
-                      index=False, encoding='utf-8-sig')
+    with CSVSink(csv_config, file_operation) as sink:
+        sink.write(table_dict)
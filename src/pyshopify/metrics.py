@@ -0,0 +1,331 @@
+"""Per-stage metrics of API calls, parsing and writes.
+
+`ShopifyApp.metrics` passes every measurement to registered callbacks as
+the metric name, value and tags. Tags hold the `endpoint` and `page` of
+API and parse metrics and the `table` and `stage` of SQL metrics.
+
+Metrics
+-------
+http_seconds: latency of an API call, tagged with the response `status`
+http_bytes: decoded response body size of an API call
+http_throttled: 429 response received
+bucket_fill: fraction of the rate limit bucket used after an API call
+parse_seconds: time to parse an API page into table dataframes
+rows: rows of a parsed `table`
+sql_seconds: time of an SQL write `stage` of a `table`, stages are
+    reflect, arrange, stage, merge and commit
+
+Examples
+--------
+>>> def log_metric(name, value, tags):
+...     print(name, value, tags)
+>>> app.metrics.add_callback(log_metric)
+>>> collector = MetricsCollector()
+>>> app.metrics.add_callback(collector)
+>>> app.orders_writer(write_sql=True)
+>>> collector.summary()
+"""
+import re
+import time
+import socket
+import logging
+import threading
+from collections import defaultdict
+from configparser import SectionProxy
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+from pandas import DataFrame
+
+logger = logging.getLogger('pyshopify')
+try:
+    import prometheus_client
+except ImportError as e:
+    logger.debug("Error importing prometheus_client: %s", e)
+    prometheus_client = None
+
+MetricCallback = Callable[[str, float, Dict[str, Any]], None]
+
+TIMERS = ['http_seconds', 'parse_seconds', 'sql_seconds']
+COUNTERS = ['http_bytes', 'http_throttled', 'rows']
+GAUGES = ['bucket_fill']
+# Labels of exported metrics, page is left out to bound cardinality
+LABELS = {
+    'http_seconds': ['endpoint', 'status'],
+    'http_bytes': ['endpoint'],
+    'http_throttled': ['endpoint'],
+    'bucket_fill': [],
+    'parse_seconds': ['endpoint'],
+    'rows': ['endpoint', 'table'],
+    'sql_seconds': ['table', 'stage'],
+}
+ENDPOINT_PATH = re.compile(r'/api/[^/]+/(.+?)\.json$')
+_prometheus: Optional['PrometheusExporter'] = None
+
+
+def endpoint_name(url: str) -> str:
+    """Endpoint of API URL, orders for .../admin/api/2022-07/orders.json"""
+    path = urlsplit(url).path
+    match = ENDPOINT_PATH.search(path)
+    if match is not None:
+        return match.group(1)
+    return path.rsplit('/', 1)[-1].replace('.json', '')
+
+
+def timed_call(func: Callable[[Any], Any], arg: Any) -> Tuple[Any, float]:
+    """Call func with arg, returns result and seconds taken.
+
+    Module level so it can be sent to process pool workers.
+    """
+    start = time.perf_counter()
+    result = func(arg)
+    return result, time.perf_counter() - start
+
+
+def table_rows(result: Any, table: str) -> Dict[str, int]:
+    """Rows per table of a parser result, a dataframe or dict of them."""
+    if isinstance(result, DataFrame):
+        return {table: len(result)}
+    if isinstance(result, dict):
+        return {tbl: len(df) for tbl, df in result.items()
+                if df is not None}
+    return {}
+
+
+class Metrics:
+    """Dispatch measurements to registered callbacks.
+
+    Callbacks take the metric name, value and dictionary of tags. They are
+    called from the thread doing the work, so they must be thread safe
+    and fast. Exceptions raised by callbacks are logged and ignored.
+
+    Parameters
+    ----------
+    callbacks: List[MetricCallback], optional
+        callbacks to register
+    """
+    def __init__(self, callbacks: Optional[List[MetricCallback]] = None
+                 ) -> None:
+        self.callbacks: List[MetricCallback] = list(callbacks or [])
+
+    @property
+    def enabled(self) -> bool:
+        """True if any callback is registered."""
+        return len(self.callbacks) > 0
+
+    def add_callback(self, callback: MetricCallback) -> None:
+        """Register callback."""
+        self.callbacks.append(callback)
+
+    def remove_callback(self, callback: MetricCallback) -> None:
+        """Unregister callback."""
+        self.callbacks.remove(callback)
+
+    def emit(self, name: str, value: float, **tags: Any) -> None:
+        """Send measurement to all callbacks."""
+        for callback in self.callbacks:
+            try:
+                callback(name, value, tags)
+            except Exception as exc:  # pylint: disable=broad-except
+                logger.debug("Metrics callback error: %s", exc)
+
+    @contextmanager
+    def timer(self, name: str, **tags: Any) -> Iterator[None]:
+        """Emit seconds spent in the with block."""
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        yield
+        self.emit(name, time.perf_counter() - start, **tags)
+
+    def page(self, endpoint: str, page: int, result: Any,
+             seconds: float) -> None:
+        """Emit parse time and rows per table of a parsed page."""
+        if not self.enabled:
+            return
+        self.emit('parse_seconds', seconds, endpoint=endpoint, page=page)
+        for table, rows in table_rows(result, endpoint).items():
+            self.emit('rows', rows, endpoint=endpoint, page=page,
+                      table=table)
+
+    def sql_stage(self, table: str, stage: str, seconds: float) -> None:
+        """`DBWriter.stage_hook` emitting SQL stage times."""
+        self.emit('sql_seconds', seconds, table=table, stage=stage)
+
+
+class MetricsCollector:
+    """Callback aggregating count, total and max of each metric.
+
+    Measurements are grouped by name and tags other than page.
+
+    Examples
+    --------
+    >>> collector = MetricsCollector()
+    >>> app.metrics.add_callback(collector)
+    >>> app.get_full_orders_df()
+    >>> collector.summary()
+    """
+    def __init__(self) -> None:
+        self.stats: Dict[Tuple, List[float]] = defaultdict(
+            lambda: [0, 0.0, 0.0])
+        self._lock = threading.Lock()
+
+    def __call__(self, name: str, value: float, tags: Dict[str, Any]) -> None:
+        key = (name,) + tuple(sorted((k, str(v)) for k, v in tags.items()
+                                     if k != 'page'))
+        with self._lock:
+            stat = self.stats[key]
+            stat[0] += 1
+            stat[1] += value
+            stat[2] = max(stat[2], value)
+
+    def summary(self) -> DataFrame:
+        """Dataframe of metric, tags, count, total, mean and max."""
+        with self._lock:
+            rows = [{'metric': key[0],
+                     'tags': ','.join(f"{k}={v}" for k, v in key[1:]),
+                     'count': stat[0], 'total': stat[1],
+                     'mean': stat[1] / stat[0], 'max': stat[2]}
+                    for key, stat in self.stats.items()]
+        if len(rows) == 0:
+            return DataFrame(columns=['metric', 'tags', 'count', 'total',
+                                      'mean', 'max'])
+        return DataFrame(rows).sort_values(['metric', 'total'],
+                                           ascending=[True, False],
+                                           ignore_index=True)
+
+    def clear(self) -> None:
+        """Drop collected measurements."""
+        with self._lock:
+            self.stats.clear()
+
+
+class StatsDExporter:
+    """Callback sending metrics to StatsD over UDP.
+
+    Timers are sent in milliseconds, `http_bytes`, `http_throttled` and
+    `rows` as counters and `bucket_fill` as a gauge. Tags other than page
+    are sent in the DogStatsD `|#tag:value` format unless `tags` is False.
+
+    Parameters
+    ----------
+    host: str
+        StatsD host
+    port: int
+        StatsD port
+    prefix: str
+        prefix of metric names
+    tags: bool
+        send tags
+    """
+    def __init__(self, host: str = 'localhost', port: int = 8125,
+                 prefix: str = 'pyshopify', tags: bool = True) -> None:
+        self.address = (host, port)
+        self.prefix = prefix
+        self.tags = tags
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+
+    def format(self, name: str, value: float, tags: Dict[str, Any]) -> str:
+        """StatsD line of measurement."""
+        if name in TIMERS:
+            line = f"{self.prefix}.{name}:{value * 1000:.3f}|ms"
+        elif name in GAUGES:
+            line = f"{self.prefix}.{name}:{value:g}|g"
+        else:
+            line = f"{self.prefix}.{name}:{value:g}|c"
+        tag_str = ','.join(f"{k}:{v}" for k, v in tags.items()
+                           if k != 'page')
+        if self.tags and tag_str:
+            line += f"|#{tag_str}"
+        return line
+
+    def __call__(self, name: str, value: float, tags: Dict[str, Any]) -> None:
+        try:
+            self.sock.sendto(self.format(name, value, tags).encode('utf-8'),
+                             self.address)
+        except OSError as exc:
+            logger.debug("StatsD send error: %s", exc)
+
+    def close(self) -> None:
+        """Close socket."""
+        self.sock.close()
+
+
+class PrometheusExporter:
+    """Callback recording metrics in prometheus_client collectors.
+
+    Timers are histograms, `http_bytes`, `http_throttled` and `rows` are
+    counters and `bucket_fill` is a gauge. Requires the optional
+    prometheus_client dependency. Expose the registry with
+    `prometheus_client.start_http_server` or by setting `prometheus_port`
+    in the metrics configuration.
+
+    Parameters
+    ----------
+    prefix: str
+        prefix of metric names
+    registry: prometheus_client.CollectorRegistry, optional
+        registry of the collectors, defaults to the global registry
+    """
+    def __init__(self, prefix: str = 'pyshopify',
+                 registry: Optional[Any] = None) -> None:
+        if prometheus_client is None:
+            raise ImportError("prometheus_client is required for the "
+                              "Prometheus exporter")
+        if registry is None:
+            registry = prometheus_client.REGISTRY
+        self.collectors: Dict[str, Any] = {}
+        for name, labels in LABELS.items():
+            metric = f"{prefix}_{name}"
+            doc = f"pyshopify {name.replace('_', ' ')}"
+            if name in TIMERS:
+                collector = prometheus_client.Histogram(
+                    metric, doc, labels, registry=registry)
+            elif name in GAUGES:
+                collector = prometheus_client.Gauge(
+                    metric, doc, labels, registry=registry)
+            else:
+                collector = prometheus_client.Counter(
+                    metric, doc, labels, registry=registry)
+            self.collectors[name] = collector
+
+    def __call__(self, name: str, value: float, tags: Dict[str, Any]) -> None:
+        collector = self.collectors.get(name)
+        if collector is None:
+            return
+        labels = LABELS[name]
+        if labels:
+            collector = collector.labels(*(str(tags.get(label, ''))
+                                           for label in labels))
+        if name in TIMERS:
+            collector.observe(value)
+        elif name in GAUGES:
+            collector.set(value)
+        else:
+            collector.inc(value)
+
+
+def build_exporter(metrics_conf: SectionProxy) -> Optional[MetricCallback]:
+    """Build exporter from the `exporter` setting of metrics configuration.
+
+    `statsd` sends to `statsd_host` and `statsd_port`, `prometheus` records
+    in the global registry and serves it on `prometheus_port` if set.
+    Any other value disables exporting.
+    """
+    exporter = metrics_conf.get('exporter', 'none').lower()
+    prefix = metrics_conf.get('prefix', 'pyshopify')
+    if exporter == 'statsd':
+        return StatsDExporter(metrics_conf.get('statsd_host', 'localhost'),
+                              metrics_conf.getint('statsd_port', 8125),
+                              prefix=prefix)
+    if exporter == 'prometheus':
+        # Collectors are registered globally once per process
+        global _prometheus  # pylint: disable=global-statement
+        if _prometheus is None:
+            _prometheus = PrometheusExporter(prefix=prefix)
+            port = metrics_conf.getint('prometheus_port', 0)
+            if port > 0:
+                prometheus_client.start_http_server(port)
+        return _prometheus
+    return None
@@ -0,0 +1,568 @@
+"""Local stand-in for the Shopify Admin REST API.
+
+Serves deterministic synthetic orders, customers, products, locations and
+inventory levels with cursor `link` pagination, `fields` filtering, the
+`X-Shopify-Shop-Api-Call-Limit` header and 429 throttling, so
+`ShopifyApp` can be load tested without a store. Records are generated
+from their index on each request, so stores of millions of orders use
+no memory.
+
+Examples
+--------
+>>> with MockShopifyServer(MockStore(orders=1_000_000)) as server:
+...     app = ShopifyApp(config_dict={'shopify': {
+...         'shop_url': server.url, 'start': '20220101', 'end': '20221231'}})
+...     app.orders_writer(write_csv=True)
+"""
+import re
+import json
+import math
+import time
+import base64
+import random
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qsl, urlencode
+from dateutil import parser
+
+logger = logging.getLogger('pyshopify')
+
+ENDPOINTS = re.compile(
+    r'/(orders/count|orders|customers|products|locations|inventory_levels)'
+    r'\.json$')
+TIME_FMT = '%Y-%m-%dT%H:%M:%S%z'
+TZ = timezone(timedelta(hours=-5))
+ORDER_ID = 100_000_000
+CUSTOMER_ID = 5_000_000
+PRODUCT_ID = 1_000_000
+VARIANT_ID = 10_000_000
+ITEM_ID = 20_000_000
+LOCATION_ID = 60_000_000
+
+
+def shopify_time(value: datetime) -> str:
+    """Format datetime like Shopify, 2022-01-01T10:00:00-05:00."""
+    stamp = value.astimezone(TZ).strftime(TIME_FMT)
+    return stamp[:-2] + ':' + stamp[-2:]
+
+
+def money(value: float) -> str:
+    """Format amount as Shopify money string."""
+    return f"{value:.2f}"
+
+
+class MockStore:
+    """Deterministic synthetic store data.
+
+    Orders and customers are spread evenly between `start` and `end`, so
+    date filters map to index ranges without scanning.
+
+    Parameters
+    ----------
+    orders: int
+        number of orders
+    customers: int
+        number of customers
+    products: int
+        number of products
+    variants: int
+        variants per product
+    locations: int
+        number of inventory locations
+    start: str
+        created_at of the first order & customer
+    end: str
+        created_at of the last order & customer
+    line_items: Tuple[int, int]
+        minimum and maximum line items per order
+    refund_rate: float
+        share of orders with a refund
+    discount_rate: float
+        share of orders with discount codes
+    seed: int
+        random seed
+    """
+    def __init__(self, orders: int = 10000, customers: int = 2000,
+                 products: int = 500, variants: int = 3, locations: int = 3,
+                 start: str = '2022-01-01', end: str = '2022-12-31',
+                 line_items: Tuple[int, int] = (1, 4),
+                 refund_rate: float = 0.1, discount_rate: float = 0.3,
+                 seed: int = 0) -> None:
+        self.counts = {
+            'orders': orders,
+            'customers': customers,
+            'products': products,
+            'locations': locations,
+            'inventory_levels': products * variants * locations,
+        }
+        self.variants = variants
+        self.start = self._parse(start)
+        self.end = self._parse(end)
+        self.line_items = line_items
+        self.refund_rate = refund_rate
+        self.discount_rate = discount_rate
+        self.seed = seed
+
+    @staticmethod
+    def _parse(value: str) -> datetime:
+        """Parse date parameter, naive dates are UTC."""
+        parsed = parser.parse(value)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed
+
+    def _step(self, endpoint: str) -> float:
+        """Seconds between consecutive records of endpoint."""
+        span = (self.end - self.start).total_seconds()
+        return span / max(self.counts[endpoint] - 1, 1)
+
+    def _offset(self, endpoint: str, idx: int) -> int:
+        """Whole seconds from start to created_at of record idx."""
+        return int(idx * self._step(endpoint))
+
+    def created_at(self, endpoint: str, idx: int) -> datetime:
+        """created_at of record idx, updated_at is one hour later."""
+        return self.start + timedelta(seconds=self._offset(endpoint, idx))
+
+    def _first_at(self, endpoint: str, secs: float) -> int:
+        """Index of first record at or after secs from start."""
+        idx = max(0, int(-(-secs // self._step(endpoint))))
+        while idx > 0 and self._offset(endpoint, idx - 1) >= secs:
+            idx -= 1
+        while (idx < self.counts[endpoint]
+               and self._offset(endpoint, idx) < secs):
+            idx += 1
+        return idx
+
+    def index_range(self, endpoint: str, params: Dict[str, str]
+                    ) -> Tuple[int, int]:
+        """Index range of records matching created_at/updated_at filters.
+
+        Both bounds are inclusive like the Shopify API.
+        """
+        low, high = 0, self.counts[endpoint]
+        if endpoint not in ('orders', 'customers'):
+            return low, high
+        for key, offset in (('created_at', 0), ('updated_at', 3600)):
+            if params.get(f'{key}_min'):
+                secs = (self._parse(params[f'{key}_min'])
+                        - self.start).total_seconds() - offset
+                low = max(low, self._first_at(endpoint, secs))
+            if params.get(f'{key}_max'):
+                secs = (self._parse(params[f'{key}_max'])
+                        - self.start).total_seconds() - offset
+                # first record strictly after secs
+                high = min(high, self._first_at(endpoint,
+                                                math.floor(secs) + 1))
+        return low, max(low, high)
+
+    def _random(self, endpoint: str, idx: int) -> random.Random:
+        return random.Random(f"{self.seed}-{endpoint}-{idx}")
+
+    def order(self, idx: int) -> dict:
+        """Synthetic order idx."""
+        rnd = self._random('orders', idx)
+        oid = ORDER_ID + idx
+        created = self.created_at('orders', idx)
+        created_at = shopify_time(created)
+        updated_at = shopify_time(created + timedelta(hours=1))
+        items = []
+        for k in range(rnd.randint(*self.line_items)):
+            product = rnd.randrange(max(self.counts['products'], 1))
+            variant = rnd.randrange(self.variants)
+            items.append({
+                "id": oid * 10 + k,
+                "variant_id": VARIANT_ID + product * 10 + variant,
+                "product_id": PRODUCT_ID + product,
+                "quantity": rnd.randint(1, 3),
+                "price": money(rnd.uniform(5, 100)),
+                "total_discount": "0.00",
+                "name": f"Product {product} - {variant}",
+                "sku": f"SKU-{product}-{variant}",
+                "title": f"Product {product}",
+                "variant_title": f"Variant {variant}",
+                "fulfillment_status": rnd.choice([None, "fulfilled"]),
+            })
+        subtotal = sum(float(item['price']) * item['quantity']
+                       for item in items)
+        codes = []
+        if rnd.random() < self.discount_rate:
+            codes = [{"code": f"SAVE{rnd.randint(5, 20)}",
+                      "amount": money(subtotal * 0.1), "type": "percentage"}]
+        discount = sum(float(code['amount']) for code in codes)
+        shipping = 5.0 if rnd.random() < 0.7 else 0.0
+        tax = round((subtotal - discount) * 0.06, 2)
+        total = subtotal - discount + shipping + tax
+        refunds = []
+        if rnd.random() < self.refund_rate:
+            item = items[0]
+            refunds.append({
+                "id": oid * 10,
+                "order_id": oid,
+                "created_at": updated_at,
+                "processed_at": updated_at,
+                "note": None,
+                "refund_line_items": [{
+                    "id": oid * 10,
+                    "quantity": 1,
+                    "line_item_id": item['id'],
+                    "subtotal": float(item['price']),
+                    "total_tax": round(float(item['price']) * 0.06, 2),
+                    "line_item": {"id": item['id'],
+                                  "variant_id": item['variant_id']},
+                }],
+                "order_adjustments": [{
+                    "id": oid * 10,
+                    "refund_id": oid * 10,
+                    "order_id": oid,
+                    "amount": money(-shipping),
+                    "tax_amount": "0.00",
+                    "kind": "shipping_refund",
+                    "reason": "Shipping refund",
+                }] if shipping else [],
+            })
+        customer = None
+        if self.counts['customers'] > 0:
+            customer = {"id": CUSTOMER_ID + idx % self.counts['customers']}
+        return {
+            "id": oid,
+            "created_at": created_at,
+            "processed_at": created_at,
+            "updated_at": updated_at,
+            "number": idx + 1,
+            "order_number": 1000 + idx + 1,
+            "name": f"#{1000 + idx + 1}",
+            "current_total_discounts": money(discount),
+            "current_total_price": money(total),
+            "current_subtotal_price": money(subtotal - discount),
+            "current_total_tax": money(tax),
+            "total_price": money(total),
+            "subtotal_price": money(subtotal - discount),
+            "total_weight": rnd.randint(0, 5000),
+            "total_tax": money(tax),
+            "total_discounts": money(discount),
+            "total_line_items_price": money(subtotal),
+            "total_price_usd": money(total),
+            "total_shipping_price_set": {
+                "shop_money": {"amount": money(shipping),
+                               "currency_code": "USD"}},
+            "taxes_included": False,
+            "processing_method": "direct",
+            "source_name": rnd.choice(["web", "pos", "shopify_draft_order"]),
+            "fulfillment_status": rnd.choice([None, "fulfilled", "partial"]),
+            "financial_status": "refunded" if refunds else "paid",
+            "payment_gateway_names": [rnd.choice(["shopify_payments",
+                                                  "paypal"])],
+            "email": f"customer{idx % 997}@example.com",
+            "tags": rnd.choice(["", "wholesale", "vip, repeat"]),
+            "landing_site": "/",
+            "referring_site": rnd.choice([None, "https://www.google.com/"]),
+            "source_identifier": None,
+            "source_url": None,
+            "customer": customer,
+            "line_items": items,
+            "refunds": refunds,
+            "discount_codes": codes,
+            "discount_applications": [{
+                "type": "discount_code",
+                "value": "10.0",
+                "value_type": "percentage",
+                "allocation_method": "across",
+                "target_selection": "all",
+                "target_type": "line_item",
+                "code": code['code'],
+            } for code in codes],
+            "shipping_lines": [{
+                "id": oid * 10,
+                "price": money(shipping),
+                "discounted_price": money(shipping),
+                "code": "Standard",
+                "title": "Standard",
+                "source": "shopify",
+                "carrier_identifier": None,
+                "phone": None,
+                "delivery_category": None,
+                "requested_fulfillment_service_id": None,
+            }] if shipping else [],
+        }
+
+    def customer(self, idx: int) -> dict:
+        """Synthetic customer idx."""
+        rnd = self._random('customers', idx)
+        created = self.created_at('customers', idx)
+        return {
+            "id": CUSTOMER_ID + idx,
+            "created_at": shopify_time(created),
+            "updated_at": shopify_time(created + timedelta(hours=1)),
+            "orders_count": rnd.randint(0, 20),
+            "total_spent": money(rnd.uniform(0, 2000)),
+            "email": f"customer{idx}@example.com",
+            "last_order_id": ORDER_ID + rnd.randrange(
+                max(self.counts['orders'], 1)),
+            "tags": rnd.choice(["", "newsletter"]),
+            "default_address": {
+                "city": "Springfield",
+                "province": rnd.choice(["Ohio", "Oregon", "Texas"]),
+                "country": "United States",
+                "zip": f"{rnd.randint(10000, 99999)}",
+            },
+        }
+
+    def product(self, idx: int) -> dict:
+        """Synthetic product idx with variants and options."""
+        rnd = self._random('products', idx)
+        pid = PRODUCT_ID + idx
+        stamp = shopify_time(self.start)
+        values = [f"Variant {k}" for k in range(self.variants)]
+        return {
+            "id": pid,
+            "title": f"Product {idx}",
+            "body_html": "<p>Synthetic product</p>",
+            "vendor": rnd.choice(["Acme", "Globex", "Initech"]),
+            "product_type": rnd.choice(["Shirt", "Mug", "Poster"]),
+            "handle": f"product-{idx}",
+            "created_at": stamp,
+            "updated_at": stamp,
+            "published_at": stamp,
+            "template_suffix": None,
+            "status": "active",
+            "published_scope": "web",
+            "tags": "",
+            "admin_graphql_api_id": f"gid://shopify/Product/{pid}",
+            "image": {"src": f"https://cdn.example.com/{pid}.jpg"},
+            "options": [{"id": pid, "product_id": pid, "name": "Title",
+                         "position": 1, "values": values}],
+            "variants": [{
+                "id": VARIANT_ID + idx * 10 + k,
+                "product_id": pid,
+                "title": values[k],
+                "price": money(rnd.uniform(5, 100)),
+                "sku": f"SKU-{idx}-{k}",
+                "position": k + 1,
+                "inventory_policy": "deny",
+                "compare_at_price": None,
+                "fulfillment_service": "manual",
+                "inventory_management": "shopify",
+                "option1": values[k],
+                "option2": None,
+                "option3": None,
+                "created_at": stamp,
+                "updated_at": stamp,
+                "barcode": None,
+                "grams": 100,
+                "image_id": None,
+                "weight": 0.1,
+                "weight_unit": "kg",
+                "inventory_item_id": ITEM_ID + idx * 10 + k,
+                "inventory_quantity": rnd.randint(0, 100),
+                "old_inventory_quantity": 0,
+                "requires_shipping": True,
+                "admin_graphql_api_id":
+                    f"gid://shopify/ProductVariant/{VARIANT_ID + idx * 10 + k}",
+            } for k in range(self.variants)],
+        }
+
+    def location(self, idx: int) -> dict:
+        """Synthetic inventory location idx."""
+        return {
+            "id": LOCATION_ID + idx,
+            "name": f"Warehouse {idx}",
+            "address1": f"{idx + 1} Main St",
+            "address2": None,
+            "city": "Springfield",
+            "country_code": "US",
+            "province_code": "OH",
+            "zip": "45501",
+            "updated_at": shopify_time(self.start),
+            "active": True,
+        }
+
+    def inventory_level(self, idx: int) -> dict:
+        """Synthetic inventory level idx, one per variant and location."""
+        items = self.counts['products'] * self.variants
+        location, item = divmod(idx, max(items, 1))
+        product, variant = divmod(item, self.variants)
+        return {
+            "inventory_item_id": ITEM_ID + product * 10 + variant,
+            "location_id": LOCATION_ID + location,
+            "available": self._random('inventory_levels', idx).randint(0, 100),
+            "updated_at": shopify_time(self.start),
+        }
+
+    def records(self, endpoint: str, idx: int) -> dict:
+        """Record idx of endpoint."""
+        return getattr(self, {
+            'orders': 'order',
+            'customers': 'customer',
+            'products': 'product',
+            'locations': 'location',
+            'inventory_levels': 'inventory_level',
+        }[endpoint])(idx)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """Request handler for `MockShopifyServer`."""
+    server: 'MockShopifyServer'
+
+    def log_message(self, format, *args) -> None:  # pylint: disable=redefined-builtin
+        logger.debug("mock server: " + format, *args)
+
+    def do_GET(self) -> None:  # pylint: disable=invalid-name
+        """Serve endpoint page."""
+        parts = urlsplit(self.path)
+        match = ENDPOINTS.search(parts.path)
+        if match is None:
+            self._send(404, {"errors": "Not Found"})
+            return
+        if self.server.latency > 0:
+            time.sleep(self.server.latency)
+        allowed, call_limit = self.server.take_call()
+        if not allowed:
+            self._send(429, {"errors": "Exceeded 2 calls per second for api "
+                                       "client. Reduce request rates to "
+                                       "resume uninterrupted service."},
+                       {'Retry-After': '1.0',
+                        'X-Shopify-Shop-Api-Call-Limit': call_limit})
+            return
+        params = dict(parse_qsl(parts.query))
+        endpoint = match.group(1)
+        headers: Dict[str, str] = {}
+        if call_limit is not None:
+            headers['X-Shopify-Shop-Api-Call-Limit'] = call_limit
+        store = self.server.store
+        if endpoint == 'orders/count':
+            low, high = store.index_range('orders', params)
+            self._send(200, {"count": high - low}, headers)
+            return
+        if 'page_info' in params:
+            cursor = json.loads(base64.urlsafe_b64decode(params['page_info']))
+            low, high = cursor['low'], cursor['high']
+            fields = cursor.get('fields')
+        else:
+            low, high = store.index_range(endpoint, params)
+            fields = params.get('fields')
+        if endpoint == 'inventory_levels' and params.get('location_ids'):
+            low, high = self._location_range(params['location_ids'],
+                                             low, high)
+        limit = min(int(params.get('limit') or 50), 250)
+        page_end = min(low + limit, high)
+        records = [store.records(endpoint, idx)
+                   for idx in range(low, page_end)]
+        if fields:
+            keep = set(fields.split(','))
+            records = [{k: v for k, v in rec.items() if k in keep}
+                       for rec in records]
+        if page_end < high:
+            cursor = {'low': page_end, 'high': high, 'fields': fields}
+            page_info = base64.urlsafe_b64encode(
+                json.dumps(cursor).encode()).decode()
+            query = urlencode({'limit': limit, 'page_info': page_info})
+            host = self.headers.get('Host', self.server.host)
+            headers['link'] = (f'<http://{host}{parts.path}?{query}>; '
+                               f'rel="next"')
+        self._send(200, {endpoint: records}, headers)
+
+    def _location_range(self, location_ids: str, low: int, high: int
+                        ) -> Tuple[int, int]:
+        """Limit inventory levels to a contiguous range of locations."""
+        store = self.server.store
+        per_location = store.counts['products'] * store.variants
+        locs = [int(x) - LOCATION_ID for x in location_ids.split(',')
+                if x.strip()]
+        if len(locs) == 0:
+            return low, low
+        return (max(low, min(locs) * per_location),
+                min(high, (max(locs) + 1) * per_location))
+
+    def _send(self, status: int, body: dict,
+              headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class MockShopifyServer(ThreadingHTTPServer):
+    """Threaded HTTP server emulating the Shopify Admin REST API.
+
+    Parameters
+    ----------
+    store: MockStore
+        synthetic store data to serve
+    host: str
+        interface to listen on
+    port: int
+        port to listen on, 0 picks a free port
+    bucket_size: int
+        leaky bucket size, 0 disables throttling and the call limit header
+    leak_rate: float
+        calls per second leaked from the bucket
+    latency: float
+        seconds added to each response
+    """
+    daemon_threads = True
+
+    def __init__(self, store: Optional[MockStore] = None,
+                 host: str = '127.0.0.1', port: int = 0,
+                 bucket_size: int = 40, leak_rate: float = 2.0,
+                 latency: float = 0.0) -> None:
+        super().__init__((host, port), MockHandler)
+        self.store = store or MockStore()
+        self.host = host
+        self.bucket_size = bucket_size
+        self.leak_rate = leak_rate
+        self.latency = latency
+        self.level = 0.0
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to use as the shop_url setting."""
+        return f"http://{self.host}:{self.server_port}"
+
+    def take_call(self) -> Tuple[bool, Optional[str]]:
+        """Add a call to the bucket, returns allowed and call limit header.
+
+        Without throttling no call limit header is sent, so clients are not
+        paced by a bucket the server does not enforce.
+        """
+        if not self.bucket_size:
+            return True, None
+        size = self.bucket_size
+        with self._lock:
+            now = time.monotonic()
+            self.level = max(0.0, self.level - (now - self._last)
+                             * self.leak_rate)
+            self._last = now
+            if self.level + 1 > size:
+                return False, f"{size}/{size}"
+            self.level += 1
+            return True, f"{min(int(self.level), size)}/{size}"
+
+    def start(self) -> 'MockShopifyServer':
+        """Serve requests in a background thread."""
+        self._thread = threading.Thread(target=self.serve_forever,
+                                        daemon=True)
+        self._thread.start()
+        logger.debug("Mock Shopify API listening on %s", self.url)
+        return self
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> 'MockShopifyServer':
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        self.stop()
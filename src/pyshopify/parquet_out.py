@@ -0,0 +1,168 @@
+"""Export tables to Parquet files."""
+import logging
+from decimal import Decimal, InvalidOperation
+from typing import Optional, Dict
+from configparser import SectionProxy
+import pandas as pd
+from pandas import DataFrame
+import sqlalchemy as sa
+from sqlalchemy.types import Variant
+from pyshopify.db_model import Base
+from pyshopify.csv_out import csv_path
+from pyshopify.return_parse import DFWork
+
+logger = logging.getLogger('pyshopify')
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError as e:
+    logger.debug("Error importing pyarrow: %s", e)
+    pa = None
+    pq = None
+
+ARROW_TYPES = {
+    'int64': 'int64',
+    'Int64': 'int64',
+    'int32': 'int32',
+    'Int32': 'int32',
+    'int16': 'int16',
+    'Int16': 'int16',
+    'float': 'float64',
+    'bool': 'bool_',
+    'str': 'string',
+}
+
+
+def money_type(col: sa.Column) -> Optional[sa.Numeric]:
+    """Numeric type of a money column, None for other columns."""
+    col_type = col.type
+    if isinstance(col_type, Variant):
+        # Money variants are Numeric in the model
+        col_type = col_type.impl
+    if isinstance(col_type, sa.Numeric) and not isinstance(col_type, sa.Float):
+        return col_type
+    return None
+
+
+def to_decimal(val, exp: Decimal) -> Optional[Decimal]:
+    """Round money string or number to exponent exp, invalid to None."""
+    if val is None or pd.isna(val):
+        return None
+    try:
+        return Decimal(str(val)).quantize(exp)
+    except InvalidOperation:
+        return None
+
+
+def table_schema(tbl_name: str) -> 'pa.Schema':
+    """Build Arrow schema from DFWork conversion plan of table."""
+    plan = DFWork.get_plan(tbl_name)
+    tbl = Base.metadata.tables[tbl_name]
+    fields = []
+    for col in plan['columns']:
+        money = money_type(tbl.c[col])
+        if col in plan['date_cols']:
+            arrow_type = pa.timestamp('us')
+        elif col in plan['dtypes']:
+            arrow_type = getattr(pa, ARROW_TYPES[plan['dtypes'][col]])()
+        elif money is not None:
+            # Exact decimals with the precision and scale of the SQL column
+            arrow_type = pa.decimal128(money.precision or 18, money.scale or 2)
+        elif isinstance(tbl.c[col].type, sa.Float):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(col, arrow_type))
+    return pa.schema(fields)
+
+
+class ParquetSink:
+    """Write pages of table dataframes to Parquet files.
+
+    Each table is written to `<filepath>/<table>.parquet` with a schema
+    built from the database model. Files are overwritten on the first
+    write of a run and each page is appended as a row group.
+
+    Arguments
+    ----------
+    parquet_config: configparser.SectionProxy
+        parquet configuration section with `filepath` and optional
+        `compression` (snappy, gzip, zstd, brotli, lz4 or none)
+
+    Examples
+    --------
+    >>> with ParquetSink(parquet_config) as sink:
+    ...     for table_dict in app.orders_iterator():
+    ...         sink.write(table_dict)
+    """
+    def __init__(self, parquet_config: SectionProxy) -> None:
+        if pa is None:
+            raise ImportError("pyarrow is required for Parquet output")
+        self.write_path = csv_path(parquet_config.get('filepath'))
+        self.compression: Optional[str] = parquet_config.get('compression',
+                                                             'snappy')
+        if self.compression is None or self.compression.lower() == 'none':
+            self.compression = None
+        self.writers: Dict[str, 'pq.ParquetWriter'] = {}
+        self.schemas: Dict[str, 'pa.Schema'] = {}
+
+    def _open(self, table: str) -> 'pq.ParquetWriter':
+        """Open table file on first write."""
+        self.schemas[table] = table_schema(table)
+        writer = pq.ParquetWriter(
+            self.write_path.joinpath(table + ".parquet"),
+            self.schemas[table], compression=self.compression)
+        self.writers[table] = writer
+        return writer
+
+    def _arrow_table(self, table: str, df: DataFrame) -> 'pa.Table':
+        """Coerce dataframe columns to table schema."""
+        schema = self.schemas[table]
+        df = df.reindex(columns=schema.names)
+        for field in schema:
+            col = df[field.name]
+            if pa.types.is_decimal(field.type):
+                exp = Decimal(1).scaleb(-field.type.scale)
+                df[field.name] = [to_decimal(val, exp) for val in col]
+            elif pa.types.is_floating(field.type) and col.dtype == object:
+                df[field.name] = pd.to_numeric(col, errors='coerce')
+            elif pa.types.is_string(field.type) and col.dtype != object:
+                df[field.name] = col.astype(object).where(col.notna(), None)
+        return pa.Table.from_pandas(df, schema=schema, preserve_index=False,
+                                    safe=False)
+
+    def write(self, table_dict: Dict[str, DataFrame]) -> None:
+        """Write a page of table dataframes as row groups."""
+        for table, df in table_dict.items():
+            if df is None:
+                continue
+            writer = self.writers.get(table)
+            if writer is None:
+                writer = self._open(table)
+            writer.write_table(self._arrow_table(table, df))
+
+    def close(self) -> None:
+        """Close all open files."""
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
+
+    def __enter__(self) -> 'ParquetSink':
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
+
+
+def parquet_send(table_dict: dict, parquet_config: SectionProxy) -> None:
+    """Write Parquet files with data from table_dict
+
+    Arguments
+    ----------
+    table_dict: Dict[str, pd.DataFrame]
+        Dictionary of table names and dataframes
+    parquet_config: configparser.SectionProxy
+        parquet configuration section
+    """
+    with ParquetSink(parquet_config) as sink:
+        sink.write(table_dict)
@@ -1,12 +1,13 @@
 """Process Shopify Return."""
 import logging
 from typing import Dict, List, Optional, Union, Tuple
+import numpy as np
 import pandas as pd
 from numpy import nan
 import sqlalchemy as sa
 import sqlalchemy.dialects.mssql as mssql
 import sqlalchemy.dialects.mysql as mysql
-from pyshopify.db_model import DBModel
+from pyshopify.db_model import Base
 logger = logging.getLogger(__name__)
 
 
@@ -102,49 +103,84 @@ def options_parse(data: List[dict]) -> Optional[pd.DataFrame]:
     return None
 
 
-def pandas_work(json_list: list) -> Dict[str, pd.DataFrame]:
+def pandas_work(json_list: dict) -> Dict[str, pd.DataFrame]:
     """Parse orders API return data."""
     table_dict = {}
+    for tbl_name, columns in orders_flatten(json_list).items():
+        if len(columns[ORDER_KEYS[tbl_name][0]]) == 0:
+            continue
+        table_dict[tbl_name] = DFWork.convert_df(tbl_name,
+                                                 pd.DataFrame(columns))
+    return table_dict
 
-    orders, prices = orders_work(json_list)
-    if orders is not None:
-        table_dict['orders'] = orders
-    if prices is not None:
-        table_dict['order_prices'] = prices
-
-    ship_lines = ship_lines_work(json_list)
-    if ship_lines is not None:
-        table_dict['ship_lines'] = ship_lines
-
-    refunds = refunds_work(json_list)
-    if refunds is not None:
-        table_dict['refunds'] = refunds
-
-        refund_li = refund_line_items_work(json_list)
-        if refund_li is not None:
-            table_dict['refund_line_item'] = refund_li
-
-        adjustments = adjustments_works(json_list)
-        if adjustments is not None:
-            table_dict['adjustments'] = adjustments
-
-    discount_apps = discount_app_work(json_list)
-    if discount_apps is not None:
-        table_dict['discount_apps'] = discount_apps
-
-    discount_codes = discount_code_work(json_list)
-    if discount_codes is not None:
-        table_dict['discount_codes'] = discount_codes
-
-    line_items = line_item_work(json_list)
-    if line_items is not None:
-        table_dict['line_items'] = line_items
-
-    order_attr = order_attr_work(json_list)
-    if order_attr is not None:
-        table_dict['order_attr'] = order_attr
 
-    return table_dict
+ORDER_KEYS: Dict[str, List[str]] = {
+    tbl: Base.metadata.tables[tbl].c.keys()
+    for tbl in ['orders', 'order_prices', 'ship_lines', 'refunds',
+                'refund_line_item', 'adjustments', 'discount_apps',
+                'discount_codes', 'line_items', 'order_attr']
+}
+GATEWAY_STRIP = str.maketrans('', '', "[]'")
+
+
+def orders_flatten(json_list: dict) -> Dict[str, Dict[str, list]]:
+    """Walk orders page once and build column lists for all order tables.
+
+    Returns a dictionary of table names with a dictionary of column
+    names and values in the column order of the database model.
+    """
+    tables = {tbl: {col: [] for col in cols} for tbl, cols in ORDER_KEYS.items()}
+
+    def append(tbl: str, record: dict, meta: dict) -> None:
+        for col, values in tables[tbl].items():
+            values.append(meta[col] if col in meta else record.get(col))
+
+    for order in json_list.get('orders') or []:
+        order_id = order.get('id')
+        processed_at = order.get('processed_at')
+        gateways = order.get('payment_gateway_names')
+        if gateways is not None:
+            gateways = str(gateways).translate(GATEWAY_STRIP)
+        append('orders', order, {
+            'customer_id': (order.get('customer') or {}).get('id'),
+            'payment_gateway_names': gateways
+        })
+        shipping_price = (((order.get('total_shipping_price_set') or {})
+                           .get('shop_money') or {}).get('amount'))
+        append('order_prices', order, {'order_id': order_id,
+                                       'total_shipping_price': shipping_price})
+        order_meta = {'order_id': order_id, 'processed_at': processed_at}
+        for ship_line in order.get('shipping_lines') or []:
+            append('ship_lines', ship_line, order_meta)
+        for refund in order.get('refunds') or []:
+            append('refunds', refund, {'order_date': processed_at})
+            refund_meta = {'refund_id': refund.get('id'),
+                           'order_id': order_id,
+                           'processed_at': refund.get('processed_at'),
+                           'order_date': processed_at}
+            for refund_li in refund.get('refund_line_items') or []:
+                line_item = refund_li.get('line_item') or {}
+                append('refund_line_item', refund_li, {
+                    **refund_meta,
+                    'line_item_id': refund_li.get(
+                        'line_item_id', line_item.get('line_item_id')),
+                    'variant_id': line_item.get('variant_id',
+                                                refund_li.get('variant_id'))
+                })
+            adjust_meta = {'processed_at': refund.get('processed_at'),
+                           'order_date': processed_at}
+            for adjustment in refund.get('order_adjustments') or []:
+                append('adjustments', adjustment, adjust_meta)
+        for idx, discount_app in enumerate(
+                order.get('discount_applications') or [], start=1):
+            append('discount_apps', discount_app, {
+                **order_meta, 'id': f"{order_id}{idx}"})
+        for discount_code in order.get('discount_codes') or []:
+            append('discount_codes', discount_code, order_meta)
+        for line_item in order.get('line_items') or []:
+            append('line_items', line_item, order_meta)
+        append('order_attr', order, {'order_id': order_id})
+    return tables
 
 
 def order_attr_work(data: list) -> Optional[pd.DataFrame]:
@@ -456,41 +492,66 @@ class DFWork:
     date_types = [sa.DateTime, sa.Date, sa.DATETIME, sa.TIMESTAMP, sa.DATE,
                   mssql.DATETIMEOFFSET]
 
+    plans: Dict[str, dict] = {}
+    date_cache: Dict[str, np.datetime64] = {}
+    date_cache_size = 100000
+
     @classmethod
     def convert_df(cls, tbl_name: str, df: pd.DataFrame):
         """Convert DataFrame Types Based on SQL Table."""
-        model = DBModel().model
-        meta = model.metadata
-        table = meta.tables[tbl_name]
-        df = cls._get_columns(df, table)
-        df = cls._fill_null(df, table)
-        df_types = cls._get_types(table)
-        if df_types:
-            df = df.astype(df_types)
-        df = cls._convert_dates(df, table)
+        plan = cls.get_plan(tbl_name)
+        df = df.reindex(columns=plan['columns'])
+        df = cls._fill_null(df, plan)
+        if plan['dtypes']:
+            df = df.astype(plan['dtypes'])
+        df = cls._convert_dates(df, plan)
         return df
 
     @classmethod
-    def _fill_null(cls, df: pd.DataFrame, table: sa.Table) -> pd.DataFrame:
+    def get_plan(cls, tbl_name: str) -> dict:
+        """Get memoised conversion plan for table.
+
+        The plan holds the table columns, pandas dtypes, numeric columns,
+        null fill values and datetime columns of the database model.
+        """
+        plan = cls.plans.get(tbl_name)
+        if plan is not None:
+            return plan
+        table = Base.metadata.tables[tbl_name]
+        num_types = [*cls.dtypes['int64'], *cls.dtypes['int16'],
+                     *cls.dtypes['int32'], *cls.dtypes['float']]
+        num_cols = []
+        fill_values: Dict[str, Union[int, str]] = {}
         for col in table.columns:
-            if type(col.type) in [
-                    *cls.dtypes['int64'], *cls.dtypes['int16'],
-                    *cls.dtypes['int32'], *cls.dtypes['float']]:
-                df[col.name].replace(r'^\s*$', nan, regex=True, inplace=True)
-            if col.nullable is False and type(col.type) in [
-                    *cls.dtypes['int64'], *cls.dtypes['int16'],
-                    *cls.dtypes['int32'], *cls.dtypes['float']]:
-                df[col.name].fillna(0, inplace=True)
+            if type(col.type) in num_types:
+                num_cols.append(col.name)
+                if col.nullable is False:
+                    fill_values[col.name] = 0
             elif type(col.type) in cls.dtypes['str']:
-                df[col.name].fillna('', inplace=True)
-        return df
+                fill_values[col.name] = ''
+        plan = {
+            'columns': table.c.keys(),
+            'dtypes': cls._get_types(table),
+            'num_cols': num_cols,
+            'fill_values': fill_values,
+            'date_cols': [col.name for col in table.c
+                          if type(col.type) in cls.date_types]
+        }
+        cls.plans[tbl_name] = plan
+        return plan
 
     @classmethod
-    def _get_columns(cls, df: pd.DataFrame, table: sa.Table) -> pd.DataFrame:
-        """Get columns from table."""
-        df.drop(df.columns.difference(table.c.keys()),
-                inplace=True, axis='columns')
-        df = df.reindex(columns=table.c.keys())
+    def _fill_null(cls, df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+        """Coerce blank numeric values to NaN and fill table defaults."""
+        df_types = df.dtypes
+        obj_cols = [col for col in plan['num_cols']
+                    if df_types[col] == object]
+        if obj_cols:
+            df[obj_cols] = df[obj_cols].apply(pd.to_numeric, errors='coerce')
+        fill_values = {col: value for col, value in plan['fill_values'].items()
+                       if df[col].hasnans}
+        if fill_values:
+            df = df.fillna(fill_values)
         return df
 
     @classmethod
@@ -505,9 +566,75 @@ class DFWork:
         return type_dict
 
     @classmethod
-    def _convert_dates(cls, df: pd.DataFrame, tbl: sa.Table) -> pd.DataFrame:
-        for col in tbl.c:
-            if type(col.type) in cls.date_types:
-                df[col.name] = pd.to_datetime(df[col.name], errors='coerce', utc=True)
-                df[col.name] = df[col.name].dt.tz_convert(None)
+    def _convert_dates(cls, df: pd.DataFrame, plan: dict) -> pd.DataFrame:
+        """Convert all date columns to naive UTC in one pass."""
+        date_cols = plan['date_cols']
+        if len(date_cols) == 0:
+            return df
+        values = df[date_cols].to_numpy(dtype=object)
+        codes, uniques = pd.factorize(values.ravel())
+        parsed = cls.parse_dates(np.asarray(uniques, dtype=object))
+        converted = np.append(parsed, np.datetime64('NaT', 'ns'))[codes]
+        converted = converted.reshape(values.shape)
+        for idx, col in enumerate(date_cols):
+            df[col] = converted[:, idx]
         return df
+
+    @classmethod
+    def parse_dates(cls, values: np.ndarray) -> np.ndarray:
+        """Parse unique date values, memoised in DFWork.date_cache.
+
+        Timestamps such as the order processed_at repeat across every
+        child table, so each value is parsed once per run.
+        """
+        result = np.empty(len(values), dtype='datetime64[ns]')
+        missing = []
+        for idx, value in enumerate(values):
+            cached = cls.date_cache.get(value)
+            if cached is None:
+                missing.append(idx)
+            else:
+                result[idx] = cached
+        if missing:
+            new_values = values[missing]
+            parsed = iso_to_utc(new_values)
+            result[missing] = parsed
+            if len(cls.date_cache) > cls.date_cache_size:
+                cls.date_cache.clear()
+            cls.date_cache.update(zip(new_values, parsed))
+        return result
+
+
+ISO_LEN = len('2022-07-01T10:00:00-04:00')
+
+
+def iso_to_utc(values: np.ndarray) -> np.ndarray:
+    """Parse ISO 8601 strings to naive UTC datetime64.
+
+    Shopify's fixed `YYYY-MM-DDTHH:MM:SS+HH:MM` layout is parsed with
+    vectorised numpy operations, any other value falls back to
+    pd.to_datetime. Unparseable values are returned as NaT.
+    """
+    result = np.full(len(values), np.datetime64('NaT'), dtype='datetime64[ns]')
+    fixed = np.array([isinstance(val, str) and len(val) == ISO_LEN
+                      and val[10] == 'T' and val[19] in '+-' and val[22] == ':'
+                      for val in values], dtype=bool)
+    if fixed.any():
+        strings = values[fixed].astype(f'U{ISO_LEN}')
+        chars = strings.view('U1').reshape(len(strings), ISO_LEN)
+        try:
+            local = strings.astype('U19').astype('datetime64[s]')
+            digits = chars[:, [20, 21, 23, 24]].astype(np.int64)
+        except ValueError:
+            fixed[:] = False
+        else:
+            sign = np.where(chars[:, 19] == '-', -1, 1)
+            offset = sign * ((digits[:, 0] * 10 + digits[:, 1]) * 60
+                             + digits[:, 2] * 10 + digits[:, 3])
+            result[fixed] = local - offset.astype('timedelta64[m]')
+    others = ~fixed
+    if others.any():
+        parsed = pd.to_datetime(pd.Series(values[others], dtype=object),
+                                errors='coerce', utc=True)
+        result[others] = parsed.dt.tz_convert(None).to_numpy()
+    return result
@@ -1,21 +1,36 @@
 """Shopify API Runner."""
 import sys
+import math
+import queue
+import asyncio
 import logging
+import threading
+import multiprocessing
+from collections import deque
+from functools import partial
+from concurrent.futures import (Executor, Future, ProcessPoolExecutor,
+                                ThreadPoolExecutor)
 from datetime import timedelta, datetime as dt
-from typing import Tuple, List, Dict, Optional, Iterator, Callable, Union
+from typing import (Tuple, List, Dict, Optional, Iterator, Callable, Union,
+                    AsyncIterator, Any)
 from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
 from configparser import SectionProxy
 from dateutil import parser
 from pandas import DataFrame
 import pandas as pd
-from pyshopify.api import api_call, header_link
+from pyshopify.api import (api_call, async_api_call, header_link,
+                           ShopifyClient, AsyncShopifyClient)
+from pyshopify.cassette import build_client, build_async_client
 from pyshopify.configure import Config
-from pyshopify.csv_out import csv_send
+from pyshopify.csv_out import csv_send, CSVSink
+from pyshopify.metrics import Metrics, build_exporter, timed_call
+from pyshopify.parquet_out import parquet_send, ParquetSink
 from pyshopify.return_parse import (locations_parse, pandas_work,
                                     customers_work, products_work,
                                     inventory_levels_parse)
 from pyshopify.sql import DBWriter
-from pyshopify.vars import api_fields
+from pyshopify.state import SyncState
+from pyshopify.vars import api_fields, MergeDict
 
 logger = logging.getLogger('pyshopify')
 logger.setLevel(logging.DEBUG)
@@ -51,7 +66,6 @@ class ShopifyApp:
         ...                        'schema': 'dbo'}
         ...                 }
         """
-        self.retry_after: int = 0
         self.orders_dict: dict = {}
         if config_dir is not None:
             self.configuration = Config(config_dir)
@@ -62,10 +76,20 @@ class ShopifyApp:
         self.csv_config: SectionProxy = self.configuration.csv_conf
         self.shop_config: SectionProxy = self.configuration.shopify
         self.sql_config: SectionProxy = self.configuration.sql_conf
+        self.parquet_config: SectionProxy = self.configuration.parquet_conf
         self.start_date, self.end_date = self.date_config()
         if not self.start_date or not self.end_date:
             raise ValueError("Error parsing dates")
+        self.metrics = Metrics()
+        exporter = build_exporter(self.configuration.metrics_conf)
+        if exporter is not None:
+            self.metrics.add_callback(exporter)
         self.db_writer = DBWriter(self.sql_config)
+        self.db_writer.stage_hook = self.metrics.sql_stage
+        self.client: ShopifyClient = build_client(self.shop_config)
+        self.sync_state = SyncState(self.shop_config.get('state_file',
+                                                         'sync_state.json'))
+        self._async_client: Optional[AsyncShopifyClient] = None
 
     def update_config(self, config: Dict[str, Dict[str, str]]):
         """Pass configuration dictionary to update instance.
@@ -105,9 +129,51 @@ class ShopifyApp:
         except ZoneInfoNotFoundError:
             return ZoneInfo('UTC')
 
+    @property
+    def pipeline(self) -> bool:
+        """Run fetch, parse and write stages in separate threads."""
+        return self.shop_config.getboolean('pipeline', False)
+
+    @property
+    def pipeline_depth(self) -> int:
+        """Pages buffered between pipeline stages."""
+        return self.shop_config.getint('pipeline_depth', 4)
+
+    @property
+    def parse_workers(self) -> int:
+        """Processes parsing orders & customers pages, 0 parses in-line."""
+        return self.shop_config.getint('parse_workers', 0)
+
+    @property
+    def incremental(self) -> bool:
+        """Incremental mode pulls records updated since the last run."""
+        return self.shop_config.getboolean('incremental', False)
+
+    def __updated_min(self, endpoint: str) -> str:
+        """Get updated_at_min from endpoint high-water mark."""
+        return self.sync_state.get(endpoint) or self.start_date
+
+    def __sync_run(self) -> Optional[List[str]]:
+        """Endpoints completed by a writer run, None unless incremental.
+
+        Runners given a list pull from the endpoint high-water mark and
+        append the endpoint once every page is fetched. Read methods pass
+        None and pull the configured dates without touching sync state.
+        """
+        return [] if self.incremental else None
+
+    def __commit_sync(self, sync: Optional[List[str]]) -> None:
+        """Persist high-water marks of endpoints completed by a run."""
+        for endpoint in sync or []:
+            self.sync_state.commit(endpoint)
+
     def __url_builder(self, end_point) -> str:
-        """Build URL for API call."""
+        """Build URL for API call, shop_url overrides the store URL."""
         config = self.shop_config
+        if config.get('shop_url'):
+            return (f"{config['shop_url'].rstrip('/')}/"
+                    f"{config['api_path'].lstrip('/')}"
+                    f"{config['api_version']}/{end_point}")
         return (f"https://{config['store_name']}.myshopify.com/"
                 f"{config['api_path']}{config['api_version']}/{end_point}")
 
@@ -297,10 +363,10 @@ class ShopifyApp:
         """
         if isinstance(shopify_config, dict):
             self.update_config({'shopify': shopify_config})
-        orders_df: Dict[str, DataFrame] = {}
+        orders_df = TableAccumulator()
         for table_dict in self.__orders_runner():
-            orders_df = combine_dicts(orders_df, table_dict)
-        return orders_df
+            orders_df.add(table_dict)
+        return orders_df.result()
 
     def get_full_customers_df(self, shopify_config: Optional[dict] = None
                               ) -> Dict[str, DataFrame]:
@@ -340,33 +406,78 @@ class ShopifyApp:
         """
         if isinstance(shopify_config, dict):
             self.update_config({'shopify': shopify_config})
-        customers_df: Dict[str, DataFrame] = {}
+        customers_df = TableAccumulator()
         for table_dict in self.__customers_runner():
-            customers_df = combine_dicts(customers_df, table_dict)
-        return customers_df
+            customers_df.add(table_dict)
+        return customers_df.result()
 
     def __data_writer(self, gen_func: Callable[..., Iterator[dict]],
                       write_csv: bool = False,
                       write_sql: bool = False,
                       csv_operation: Optional[str] = None,
-                      config: Optional[Dict[str, dict]] = None) -> None:
+                      config: Optional[Dict[str, dict]] = None,
+                      write_parquet: bool = False) -> None:
         """Internal data writer that take data generator
             and performs desired writes"""
         if isinstance(config, dict):
             self.update_config(config)
+        csv_sink = None
+        parquet_sink = None
+        if write_csv is True:
+            if self.csv_config.get('filepath') is None:
+                logger.error("Please configure csv output directory")
+                write_csv = False
+            else:
+                csv_sink = CSVSink(self.csv_config, csv_operation)
+        if write_parquet is True:
+            if self.parquet_config.get('filepath') is None:
+                logger.error("Please configure parquet output directory")
+            else:
+                parquet_sink = ParquetSink(self.parquet_config)
+        batch_pages = max(self.sql_config.getint('batch_pages', 1), 1)
+        batch_rows = self.sql_config.getint('batch_rows', 0)
+        batched = write_sql is True and (batch_pages > 1 or batch_rows > 0)
+        sql_batch = TableAccumulator()
         i = 0
-        for table_dict in gen_func():
-            i += 1
-            if len(table_dict.keys()) == 0:
-                return
-            if write_sql is True:
-                self.__sql_writer(table_dict, i)
-            if write_csv is True:
-                self.__csv_writer(table_dict, csv_operation)
+        # Each run has its own list, marks are only committed below once
+        # every page is written
+        sync = self.__sync_run()
+        pages = gen_func(sync=sync)
+        if self.pipeline:
+            pages = prefetch(pages, self.pipeline_depth)
+        try:
+            for table_dict in pages:
+                i += 1
+                if len(table_dict.keys()) == 0:
+                    break
+                if batched:
+                    sql_batch.add(table_dict)
+                    if sql_batch.pages >= batch_pages or (
+                            batch_rows > 0 and sql_batch.rows >= batch_rows):
+                        self.__sql_writer(sql_batch.result(dedupe=True), i)
+                        sql_batch.clear()
+                elif write_sql is True:
+                    self.__sql_writer(table_dict, i)
+                if csv_sink is not None:
+                    csv_sink.write(table_dict)
+                if parquet_sink is not None:
+                    parquet_sink.write(table_dict)
+            if sql_batch.pages > 0:
+                self.__sql_writer(sql_batch.result(dedupe=True), i)
+        finally:
+            # Stop the prefetch thread or sharded workers on early exit
+            if hasattr(pages, 'close'):
+                pages.close()
+            if csv_sink is not None:
+                csv_sink.close()
+            if parquet_sink is not None:
+                parquet_sink.close()
+        self.__commit_sync(sync)
 
     def orders_customers_writer(self, write_sql: bool = False,
                                 write_csv: bool = False,
-                                config: Optional[dict] = None):
+                                config: Optional[dict] = None,
+                                write_parquet: bool = False):
         """Write orders & customer data to csv and SQL server.
 
         Parameters
@@ -377,18 +488,21 @@ class ShopifyApp:
             write data to CSV files, by default False
         config : dict, optional
             full configuration dictionary, by default {}
+        write_parquet : bool, optional
+            write data to Parquet files, by default False
 
         See Also
         --------
         See ShopifyApp docstring for full configuration dictionary syntax
         """
         self.orders_writer(write_sql=write_sql, write_csv=write_csv,
-                           config=config)
+                           config=config, write_parquet=write_parquet)
         self.customers_writer(write_sql=write_sql, write_csv=write_csv,
-                              config=config)
+                              config=config, write_parquet=write_parquet)
 
     def orders_writer(self, write_csv: bool = False, write_sql: bool = False,
-                      config: Optional[dict] = None) -> None:
+                      config: Optional[dict] = None,
+                      write_parquet: bool = False) -> None:
         """Write orders data to CSV or SQL output based on configuration.
 
         Pass configuration as a dictionary of config sections to configure
@@ -419,17 +533,21 @@ class ShopifyApp:
             ...         'filepath': 'output_dir'
             ...     }
             ... }
+        write_parquet : bool
+            Write data to parquet
 
         Returns
         -------
         None
         """
         self.__data_writer(self.__orders_runner, write_csv=write_csv,
-                           write_sql=write_sql, config=config)
+                           write_sql=write_sql, config=config,
+                           write_parquet=write_parquet)
 
     def customers_writer(self, write_csv: bool = False,
                          write_sql: bool = False,
-                         config: Optional[dict] = None) -> None:
+                         config: Optional[dict] = None,
+                         write_parquet: bool = False) -> None:
         """Write customer data to CSV or SQL output based on configuration.
         Pass configuration as a dictionary of config sections to configure
         output.
@@ -459,9 +577,12 @@ class ShopifyApp:
             ...         'filepath': 'output_dir'
             ...     }
             ... }
+        write_parquet : bool
+            Write data to parquet
         """
         self.__data_writer(gen_func=self.__customers_runner, write_csv=write_csv,
-                           write_sql=write_sql, config=config)
+                           write_sql=write_sql, config=config,
+                           write_parquet=write_parquet)
 
     def write_all_to_sql(self, config: Optional[dict] = None) -> None:
         """Write products, inventory orders and customers to SQL
@@ -519,8 +640,36 @@ class ShopifyApp:
         self.orders_writer(write_csv=True, write_sql=False, config=config)
         self.customers_writer(write_csv=True, write_sql=False, config=config)
 
+    def write_all_to_parquet(self, config: Optional[dict] = None) -> None:
+        """Write Products, Inventory, Orders and Customers data to Parquet
+        files based on configuration. Pass configuration as a dictionary
+
+        Arguments
+        ---------
+        config (Dict[str, Dict[str, str]]): Configuration dictionary with
+            shopify and parquet sections. For example:
+            >>> config = {
+            ...     'shopify': {
+            ...         'access_token': 'access_token',
+            ...         'store_name': 'store-name-in-admin-url',
+            ...         'api_version': '2022-07',
+            ...         'days': 30
+            ...     },
+            ...     'parquet': {
+            ...         'filepath': 'parquet_export',
+            ...         'compression': 'snappy'
+            ...      }
+            ...  }
+        """
+        self.products_writer(write_parquet=True, config=config)
+        self.inventory_locations_writer(write_parquet=True, config=config)
+        self.inventory_levels_writer(write_parquet=True, config=config)
+        self.orders_writer(write_parquet=True, config=config)
+        self.customers_writer(write_parquet=True, config=config)
+
     def products_writer(self, write_sql=False, write_csv=False,
-                        config: Optional[dict] = None) -> None:
+                        config: Optional[dict] = None,
+                        write_parquet: bool = False) -> None:
         """Write Products and Inventory Tables to SQL Server or csv.
         Arguments
         ---------
@@ -530,6 +679,8 @@ class ShopifyApp:
             Write data to csv
         config : Dict[str, Dict[str, str]]
             Full config dictionary
+        write_parquet : bool
+            Write data to parquet
 
         Returns
         -------
@@ -539,16 +690,17 @@ class ShopifyApp:
         --------
         ShopifyApp.__init__ for full config dictionary example
         """
-        if write_sql is False and write_csv is False:
+        if write_sql is False and write_csv is False and write_parquet is False:
             logger.error("No output enabled")
             return
         self.__data_writer(gen_func=self.__products_runner, write_sql=write_sql,
                            write_csv=write_csv, csv_operation='w',
-                           config=config)
+                           config=config, write_parquet=write_parquet)
 
     def products_inventory_writer(self, write_sql: bool = False,
                                   write_csv: bool = False,
-                                  config: Optional[dict] = None) -> None:
+                                  config: Optional[dict] = None,
+                                  write_parquet: bool = False) -> None:
         """Write products and inventory data
 
         Arguments
@@ -559,6 +711,8 @@ class ShopifyApp:
             Write data to csv
         config_dict : Optional[dict], optional
             Full config dict, optional
+        write_parquet: bool, optional
+            Write data to parquet
 
         Returns
         -------
@@ -569,11 +723,11 @@ class ShopifyApp:
         ShopifyApp : ShopifyApp class showing full configuration example
         """
         self.inventory_locations_writer(write_csv=write_csv, write_sql=write_sql,
-                                        config=config)
+                                        config=config, write_parquet=write_parquet)
         self.inventory_levels_writer(write_csv=write_csv, write_sql=write_sql,
-                                     config=config)
+                                     config=config, write_parquet=write_parquet)
         self.products_writer(write_sql=write_sql, write_csv=write_csv,
-                             config=config)
+                             config=config, write_parquet=write_parquet)
 
     def get_products_inventory(self) -> Dict[str, DataFrame]:
         """Get products, options, variants, inventory locations and
@@ -631,12 +785,32 @@ class ShopifyApp:
         ...     'product_options': DataFrame
         ... }
         """
-        products: Dict[str, DataFrame] = {}
+        products = TableAccumulator()
         for products_data in self.__products_runner():
-            if len(products_data) == 0:
-                return {'products': None}
-            products = combine_dicts(products, products_data)
-        return products
+            products.add(products_data)
+        if products.pages == 0:
+            return {'products': None}
+        return products.result()
+
+    def products_iterator(self, accumulate: bool = False
+                          ) -> Iterator[Dict[str, DataFrame]]:
+        """Products data generator yields dict of product data
+            in dataframes for each page of products.
+
+        Arguments
+        ---------
+        accumulate : bool, optional
+            Yield a single dictionary with all pages after the last page,
+            by default False
+
+        Yields
+        ------
+        dict: dictionary of dataframes for products endpoint:
+            >>> {'products': DataFrame,
+            ...  'variants': DataFrame,
+            ...  'product_options': DataFrame}
+        """
+        yield from self.__products_runner(accumulate=accumulate)
 
     def get_inventory_locations(self) -> Dict[str, Optional[DataFrame]]:
         """Get Inventory Locations DataFrame"""
@@ -652,7 +826,8 @@ class ShopifyApp:
 
     def inventory_locations_writer(self, write_csv: bool = False,
                                    write_sql: bool = False,
-                                   config: Optional[dict] = None) -> None:
+                                   config: Optional[dict] = None,
+                                   write_parquet: bool = False) -> None:
         """Write locations to SQL Server or CSV file.
 
         Retrieves and writes inventory locations associated with
@@ -666,12 +841,14 @@ class ShopifyApp:
             Set to True to write data to CSV, by default False
         config_dict : dict, optional
             Configuration dictionary, by default {}
+        write_parquet : bool, optional
+            Set to True to write data to Parquet, by default False
 
         Returns
         -------
         None
         """
-        if write_csv is False and write_sql is False:
+        if write_csv is False and write_sql is False and write_parquet is False:
             logger.error("No output enabled")
         if config is not None:
             self.update_config(config)
@@ -682,13 +859,18 @@ class ShopifyApp:
             return
         # if self.sql_merge is not None:
         #     self.sql_merge(locations, 0, self.engine, self.sql_config)
-        if self.db_writer is not None:
+        if write_sql is True and self.db_writer is not None:
             self.db_writer.sql_merge(locations)
+        if write_csv is True:
+            self.__csv_writer(locations, 'w')
+        if write_parquet is True:
+            self.__parquet_writer(locations)
         return
 
     def inventory_levels_writer(self, write_csv: bool = False,
                                 write_sql: bool = False,
-                                config: Optional[dict] = None) -> None:
+                                config: Optional[dict] = None,
+                                write_parquet: bool = False) -> None:
         """ Write Inventory levels to SQL Server or CSV file.
 
         Arguments
@@ -699,6 +881,8 @@ class ShopifyApp:
             Set to true to write inventory level data to SQL server. Defaults to False.
         config : (dict, optional)
             Set configuration. Defaults to {}.
+        write_parquet : (bool, optional)
+            Set to true to output inventory levels to a parquet file. Defaults to False.
 
         See Also
         --------
@@ -706,7 +890,8 @@ class ShopifyApp:
         """
         if config is not None:
             self.update_config(config)
-        inv = self.get_inventory_levels()
+        sync = self.__sync_run()
+        inv = self.__inventory_levels(sync=sync)
         if inv.get('inventory_levels') is None:
             logger.debug("No inventory levels found")
             return
@@ -714,6 +899,10 @@ class ShopifyApp:
             self.__sql_writer(inv, 0)
         if write_csv is True:
             self.__csv_writer(inv, 'w')
+        if write_parquet is True:
+            self.__parquet_writer(inv)
+        # Only advance the incremental mark after the writes succeed
+        self.__commit_sync(sync)
 
     def get_inventory_levels(self, locations: Optional[Union[list, str]] = None
                              ) -> Dict[str, Optional[DataFrame]]:
@@ -733,10 +922,22 @@ class ShopifyApp:
             DataFrame of all inventory levels
             {'inventory_levels': DataFrame}
         """
+        return self.__inventory_levels(locations)
 
+    def __inventory_levels(self, locations: Optional[Union[list, str]] = None,
+                           sync: Optional[List[str]] = None
+                           ) -> Dict[str, Optional[DataFrame]]:
+        """Get inventory levels, incremental when given a sync list."""
         if self.db_writer is None:
             raise Exception("Unable to initialize DBWriter")
         url = self.__url_builder('inventory_levels.json')
+        level_params = {}
+        track = None
+        if sync is not None:
+            track = 'inventory_levels'
+            if self.sync_state.get('inventory_levels') is not None:
+                level_params['updated_at_min'] = self.__updated_min(
+                    'inventory_levels')
         item_list = []
         if locations is None or len(locations) == 0:
             locations_df = self.get_inventory_locations().get('inventory_locations')
@@ -765,19 +966,23 @@ class ShopifyApp:
                     char_count = cnt
             for locs in loc_lists:
                 locs_str = ','.join([str(x) for x in locs])
-                for items in self.__request_runner(url,
-                                                   params={'location_ids': locs_str}):
+                for items in self.__request_runner(
+                        url, params={'location_ids': locs_str, **level_params},
+                        track=track):
                     inventory_levels = items.get('inventory_levels')
                     if len(inventory_levels) == 0:
                         break
                     item_list.extend(items.get('inventory_levels'))
         else:
-            for items in self.__request_runner(url,
-                                               params={'location_ids': locations_str}):
+            for items in self.__request_runner(
+                    url, params={'location_ids': locations_str, **level_params},
+                    track=track):
                 inventory_levels = items.get('inventory_levels')
                 if len(inventory_levels) == 0:
                     break
                 item_list.extend(inventory_levels)
+        if sync is not None:
+            sync.append('inventory_levels')
         if len(item_list) == 0:
             return {"inventory_levels": None}
         parsed_levels = inventory_levels_parse(item_list)
@@ -847,14 +1052,29 @@ class ShopifyApp:
         csv_send(data, self.csv_config, csv_operation)
         return True
 
-    def __products_runner(self, extra_params: Optional[dict] = None
+    def __parquet_writer(self, data: Dict[str, DataFrame]) -> bool:
+        """Write Parquet data to file"""
+        if self.parquet_config.get('filepath') is None:
+            logger.error("Please configure parquet output directory")
+            return False
+        parquet_send(data, self.parquet_config)
+        return True
+
+    def __products_runner(self, extra_params: Optional[dict] = None,
+                          accumulate: bool = False,
+                          sync: Optional[List[str]] = None
                           ) -> Iterator[Dict[str, DataFrame]]:
-        """Pulls product data but yields a full set of data.
+        """Pulls product data and yields each page of data.
 
         Arguments
         ---------
         extra_params : (dict, optional)
             Extra parameters to pass to the request. Defaults to {}.
+        accumulate : (bool, optional)
+            Yield a single full set of data after the last page.
+            Defaults to False.
+        sync : (list, optional)
+            Incremental run endpoint list, see `__sync_run`.
 
         Yields
         ------
@@ -864,73 +1084,238 @@ class ShopifyApp:
         init_params = {
             "limit": 250,
         }
+        if sync is not None and self.sync_state.get('products') is not None:
+            init_params['updated_at_min'] = self.__updated_min('products')
         if extra_params is not None:
             init_params.update(extra_params)
-        products_data = self.__request_runner(url, init_params)
-        prod_list: Dict[str, DataFrame] = {}
-        while True:
-            try:
-                resp_data = next(products_data)
-            except StopIteration:
-                break
-            table_dict = products_work(resp_data.get('products'))
-            prod_list = combine_dicts(prod_list, table_dict)
-        yield table_dict
-
-    def __customers_runner(self) -> Iterator[Dict[str, DataFrame]]:
-        """Iterate customers API Return."""
-        url = self.__url_builder('customers.json')
-        init_params = {
+        products_data = self.__fetch_stage(
+            url, init_params, track='products' if sync is not None else None)
+        prod_list = TableAccumulator()
+        for page, resp_data in enumerate(products_data, 1):
+            table_dict, seconds = timed_call(products_work,
+                                             resp_data.get('products'))
+            self.metrics.page('products', page, table_dict, seconds)
+            if len(table_dict) == 0:
+                continue
+            if accumulate:
+                prod_list.add(table_dict)
+            else:
+                yield table_dict
+        if accumulate:
+            yield prod_list.result()
+        if sync is not None:
+            sync.append('products')
+
+    def __customers_params(self, incremental: bool = False) -> dict:
+        """Customers endpoint query parameters."""
+        if incremental:
+            return {
+                "updated_at_min": self.__updated_min('customers'),
+                "limit": self.shop_config.get('items_per_page'),
+            }
+        return {
             "updated_at_min": self.start_date,
             "updated_at_max": self.end_date,
             "limit": self.shop_config.get('items_per_page'),
         }
-        customer_data = self.__request_runner(url, init_params)
-        i = 1
-        while True:
-            try:
-                resp_data = next(customer_data)
-
-            except StopIteration:
-                break
-            table_dict = {
-                'customers': customers_work(resp_data)
-            }
-            if table_dict.get('customers') is None:
-                break
-            yield table_dict
-            i += 1
 
-    def __orders_runner(self) -> Iterator[Dict[str, DataFrame]]:
-        """Call API method and run SQL, CSV and data exports."""
+    def __orders_params(self, start_date: Optional[str] = None,
+                        end_date: Optional[str] = None,
+                        incremental: bool = False) -> dict:
+        """Orders endpoint query parameters."""
         col_list = [str(key) for key in api_fields]
         col_str = ",".join(col_list)
-        url = self.__url_builder('orders.json')
-        init_params = {
+        if incremental and start_date is None:
+            return {
+                "status": "any",
+                "updated_at_min": self.__updated_min('orders'),
+                "limit": self.shop_config.get('items_per_page'),
+                "fields": col_str
+            }
+        return {
             "status": "any",
-            "created_at_min": self.start_date,
-            "created_at_max": self.end_date,
+            "created_at_min": start_date or self.start_date,
+            "created_at_max": end_date or self.end_date,
             "limit": self.shop_config.get('items_per_page'),
             "fields": col_str
         }
-        order_dict = self.__request_runner(url, init_params)
-        i = 1
-        while True:
-            try:
-                resp_data = next(order_dict)
 
-            except StopIteration:
+    def __customers_runner(self, sync: Optional[List[str]] = None
+                           ) -> Iterator[Dict[str, DataFrame]]:
+        """Iterate customers API Return."""
+        url = self.__url_builder('customers.json')
+        init_params = self.__customers_params(incremental=sync is not None)
+        customer_data = self.__fetch_stage(
+            url, init_params, track='customers' if sync is not None else None)
+        for customers_df in self.__parse_stage(customers_work, customer_data,
+                                               'customers'):
+            table_dict = {
+                'customers': customers_df
+            }
+            if table_dict.get('customers') is None:
                 break
-            table_dict = pandas_work(resp_data)
+            yield table_dict
+        if sync is not None:
+            sync.append('customers')
 
+    def __orders_runner(self, sync: Optional[List[str]] = None
+                        ) -> Iterator[Dict[str, DataFrame]]:
+        """Call API method and run SQL, CSV and data exports."""
+        incremental = sync is not None
+        windows = self.__order_windows(incremental)
+        if len(windows) > 1:
+            yield from self.__sharded_orders_runner(windows)
+            return
+        url = self.__url_builder('orders.json')
+        init_params = self.__orders_params(incremental=incremental)
+        order_dict = self.__fetch_stage(
+            url, init_params, track='orders' if incremental else None)
+        for table_dict in self.__parse_stage(pandas_work, order_dict,
+                                             'orders'):
             yield table_dict
             if table_dict is None:
                 break
+        if sync is not None:
+            sync.append('orders')
+
+    def __parse_stage(self, parse_func: Callable[[dict], Any],
+                      pages: Iterator[dict], endpoint: str) -> Iterator[Any]:
+        """Parse pages in order, in a process pool if parse_workers is set.
+
+        Parse time and rows of each page are sent to metrics.
+        """
+        workers = self.parse_workers
+        if workers <= 0:
+            for page, resp_data in enumerate(pages, 1):
+                result, seconds = timed_call(parse_func, resp_data)
+                self.metrics.page(endpoint, page, result, seconds)
+                yield result
+            return
+        executor = process_pool(workers)
+        try:
+            for page, (result, seconds) in enumerate(pool_map(
+                    executor, partial(timed_call, parse_func), pages,
+                    workers * 2), 1):
+                self.metrics.page(endpoint, page, result, seconds)
+                yield result
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def __order_windows(self, incremental: bool = False
+                        ) -> List[Tuple[str, str]]:
+        """Split configured dates into windows for sharded orders pulls.
+
+        `window_days` splits by a fixed number of days, `orders_per_window`
+        sizes the windows from the orders count endpoint. Incremental runs
+        are not split.
+        """
+        window_days = self.shop_config.getint('window_days', 0)
+        per_window = self.shop_config.getint('orders_per_window', 0)
+        if incremental:
+            return [(self.start_date, self.end_date)]
+        if window_days > 0:
+            return date_windows(self.start_date, self.end_date,
+                                days=window_days)
+        if per_window > 0:
+            params = self.__orders_params()
+            params.pop('fields')
+            params.pop('limit')
+            resp = api_call(self.__url_builder('orders/count.json'),
+                            self.shop_config, init_params=params,
+                            page=False, client=self.client,
+                            metrics=self.metrics)
+            if resp is None:
+                return [(self.start_date, self.end_date)]
+            count = resp.json().get('count', 0)
+            logger.debug("Splitting %s orders into windows of %s",
+                         count, per_window)
+            return date_windows(self.start_date, self.end_date,
+                                count=math.ceil(count / per_window))
+        return [(self.start_date, self.end_date)]
+
+    def __sharded_orders_runner(self, windows: List[Tuple[str, str]]
+                                ) -> Iterator[Dict[str, DataFrame]]:
+        """Paginate date windows concurrently and yield pages in order.
+
+        Each window buffers at most `pipeline_depth` parsed pages ahead of
+        the consumer.
+        """
+        url = self.__url_builder('orders.json')
+        workers = self.shop_config.getint('window_workers', 4)
+        done = object()
+        queues: List[queue.Queue] = [
+            queue.Queue(maxsize=max(self.pipeline_depth, 1)) for _ in windows]
+        stop = threading.Event()
+
+        def put(idx: int, item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    queues[idx].put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    continue
+            return False
 
-            i += 1
+        parse_pool = None
+        if self.parse_workers > 0:
+            parse_pool = process_pool(self.parse_workers)
 
-    def __request_runner(self, initial_url: str, params: Optional[dict] = None):
-        """shopify API data iterator."""
+        def window_worker(idx: int, start: str, end: str) -> None:
+            try:
+                for resp_data in self.__request_runner(
+                        url, self.__orders_params(start, end)):
+                    if parse_pool is not None:
+                        parsed = parse_pool.submit(timed_call, pandas_work,
+                                                   resp_data)
+                    else:
+                        parsed = timed_call(pandas_work, resp_data)
+                    if not put(idx, parsed):
+                        break
+            except Exception as exc:  # pylint: disable=broad-except
+                put(idx, exc)
+            finally:
+                put(idx, done)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for idx, (start, end) in enumerate(windows):
+                executor.submit(window_worker, idx, start, end)
+            page = 0
+            try:
+                for window_queue in queues:
+                    while True:
+                        parsed = window_queue.get()
+                        if parsed is done:
+                            break
+                        if isinstance(parsed, Exception):
+                            raise parsed
+                        if isinstance(parsed, Future):
+                            parsed = parsed.result()
+                        table_dict, seconds = parsed
+                        page += 1
+                        self.metrics.page('orders', page, table_dict,
+                                          seconds)
+                        yield table_dict
+            finally:
+                stop.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+                if parse_pool is not None:
+                    parse_pool.shutdown(wait=False, cancel_futures=True)
+
+    def __fetch_stage(self, initial_url: str, params: Optional[dict] = None,
+                      track: Optional[str] = None) -> Iterator[dict]:
+        """Page iterator, fetched ahead in a thread in pipeline mode."""
+        pages = self.__request_runner(initial_url, params, track=track)
+        if self.pipeline:
+            return prefetch(pages, self.pipeline_depth)
+        return pages
+
+    def __request_runner(self, initial_url: str, params: Optional[dict] = None,
+                         track: Optional[str] = None):
+        """shopify API data iterator.
+
+        `track` is the response key to track updated_at high-water marks
+        of incremental writer runs.
+        """
         j = 1
         url: Optional[str] = initial_url
         while True:
@@ -942,17 +1327,346 @@ class ShopifyApp:
                 page = True
             j += 1
             resp = api_call(url, self.shop_config,
-                            init_params=params, page=page)
+                            init_params=params, page=page,
+                            client=self.client, metrics=self.metrics,
+                            tags={'page': j - 1})
             if resp is None:
                 break
-            url, self.retry_after = header_link(resp.headers)
+            url, _ = header_link(resp.headers)
+            resp_data = resp.json()
+            if track is not None:
+                self.sync_state.track(track, resp_data.get(track))
+            yield resp_data
+
+    @property
+    def async_client(self) -> AsyncShopifyClient:
+        """Async HTTP client, created on first use."""
+        if self._async_client is None:
+            self._async_client = build_async_client(self.shop_config)
+        return self._async_client
+
+    async def close_async(self) -> None:
+        """Close async client connections, call before the event loop ends."""
+        if self._async_client is not None:
+            await self._async_client.close()
+
+    async def orders_iterator_async(self, shopify_config: Optional[dict] = None
+                                    ) -> AsyncIterator[Dict[str, DataFrame]]:
+        """Async generator yielding dict of order data in dataframes.
+
+        Async counterpart of `orders_iterator`. The next page is requested
+        while the current page is parsed in an executor thread.
+
+        Arguments
+        ---------
+        shopify_config (Optional[dict]): Pass configuration dictionary
+            with shopify configuration
+
+        Examples
+        --------
+        >>> async for order_dict in app.orders_iterator_async():
+        ...     order_dict.items()
+        >>> await app.close_async()
+
+        See Also
+        --------
+        ShopifyApp.orders_iterator for the yielded dictionary structure
+        """
+        if isinstance(shopify_config, dict):
+            self.update_config({'shopify': shopify_config})
+        url = self.__url_builder('orders.json')
+        async for table_dict in self.__async_parse_runner(
+                url, self.__orders_params(), pandas_work, 'orders'):
+            yield table_dict
 
-            yield resp.json()
+    async def customers_iterator_async(self,
+                                       shopify_config: Optional[dict] = None
+                                       ) -> AsyncIterator[Dict[str, DataFrame]]:
+        """Async generator yielding dict of customer data in dataframes.
+
+        Async counterpart of `customers_iterator`.
+
+        Arguments
+        ---------
+        shopify_config (Optional[dict]): Pass configuration dictionary
+            with shopify configuration
+
+        Yields
+        ------
+        AsyncIterator[dict]: dictionary of dataframes for customers enpoint
+            >>> [('customers', <pandas.DataFrame>)]
+        """
+        if isinstance(shopify_config, dict):
+            self.update_config({'shopify': shopify_config})
+        url = self.__url_builder('customers.json')
+        async for customers in self.__async_parse_runner(
+                url, self.__customers_params(), customers_work, 'customers'):
+            if customers is None:
+                break
+            yield {'customers': customers}
+
+    async def get_products_async(self) -> Dict[str, Optional[DataFrame]]:
+        """Get Product, Variant & Product Options Data asynchronously.
+
+        Async counterpart of `get_products`.
+
+        Returns
+        -------
+        Dict[str, DataFrame]
+            Dictionary of product, variant & options DataFrames
+        """
+        url = self.__url_builder('products.json')
+        init_params = {"limit": 250}
+        products = TableAccumulator()
+        async for products_data in self.__async_parse_runner(
+                url, init_params,
+                lambda resp_data: products_work(resp_data.get('products')),
+                'products'):
+            if len(products_data) == 0:
+                break
+            products.add(products_data)
+        if products.pages == 0:
+            return {'products': None}
+        return products.result()
+
+    async def __async_parse_runner(self, initial_url: str, params: dict,
+                                   parse_func: Callable[[dict], Any],
+                                   endpoint: str) -> AsyncIterator[Any]:
+        """Parse pages in an executor while the next page is fetched."""
+        loop = asyncio.get_running_loop()
+        page = 0
+        async for resp_data in self.__async_request_runner(initial_url,
+                                                           params):
+            page += 1
+            result, seconds = await loop.run_in_executor(
+                None, timed_call, parse_func, resp_data)
+            self.metrics.page(endpoint, page, result, seconds)
+            yield result
+
+    async def __async_request_runner(self, initial_url: str,
+                                     params: Optional[dict] = None
+                                     ) -> AsyncIterator[dict]:
+        """Async shopify API data iterator, prefetches the next page."""
+        page = 1
+        task: Optional[asyncio.Task] = asyncio.ensure_future(async_api_call(
+            initial_url, self.shop_config, self.async_client,
+            init_params=params, page=False, metrics=self.metrics,
+            tags={'page': page}))
+        try:
+            while task is not None:
+                result = await task
+                task = None
+                if result is None:
+                    break
+                resp_data, headers = result
+                url, _ = header_link(headers)
+                if url is not None:
+                    page += 1
+                    task = asyncio.ensure_future(async_api_call(
+                        url, self.shop_config, self.async_client,
+                        metrics=self.metrics, tags={'page': page}))
+                yield resp_data
+        finally:
+            if task is not None:
+                task.cancel()
+
+
+def date_windows(start_date: str, end_date: str, days: Optional[int] = None,
+                 count: Optional[int] = None) -> List[Tuple[str, str]]:
+    """Split ISO date range into consecutive non-overlapping windows.
+
+    Arguments
+    ---------
+    start_date: str
+        ISO format start of range
+    end_date: str
+        ISO format end of range
+    days: int, optional
+        length of each window in days
+    count: int, optional
+        number of equal windows, used if days is not set
+
+    Returns
+    -------
+    List[Tuple[str, str]]
+        list of (start, end) ISO formatted windows in date order
+    """
+    start = parser.isoparse(start_date)
+    end = parser.isoparse(end_date)
+    if days is not None and days > 0:
+        step = timedelta(days=days)
+    elif count is not None and count > 1:
+        step = timedelta(seconds=math.ceil((end - start).total_seconds() / count))
+    else:
+        return [(start_date, end_date)]
+    # Shopify timestamps are whole seconds and both bounds are inclusive,
+    # round inward so the windows select the same orders as the full range
+    if start.microsecond:
+        start = start.replace(microsecond=0) + timedelta(seconds=1)
+    end = end.replace(microsecond=0)
+    if end < start:
+        return [(start_date, end_date)]
+    step = max(step, timedelta(seconds=1))
+    # Window i covers [bounds[i], bounds[i + 1] - 1s], consecutive windows
+    # share a boundary so there is no gap or overlap
+    bounds = [start]
+    while bounds[-1] + step <= end:
+        bounds.append(bounds[-1] + step)
+    bounds.append(end + timedelta(seconds=1))
+    return [(win_start.isoformat(),
+             (win_end - timedelta(seconds=1)).isoformat())
+            for win_start, win_end in zip(bounds, bounds[1:])
+            if win_start < win_end]
+
+
+def prefetch(items: Iterator[Any], maxsize: int = 4) -> Iterator[Any]:
+    """Consume an iterator in a background thread through a bounded queue.
+
+    The producer blocks when `maxsize` items are waiting, exceptions are
+    raised in the consumer and closing the returned generator stops the
+    producer after its current item.
+
+    Arguments
+    ---------
+    items : Iterator
+        iterator run in the background thread
+    maxsize : int
+        maximum number of items buffered ahead of the consumer
+
+    Examples
+    --------
+    >>> for table_dict in prefetch(app.orders_iterator(), 4):
+    ...     write(table_dict)
+    """
+    done = object()
+    buffer: queue.Queue = queue.Queue(maxsize=max(maxsize, 1))
+    stop = threading.Event()
+
+    def put(item: Any) -> bool:
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def producer() -> None:
+        try:
+            for item in items:
+                if not put(item):
+                    return
+        except Exception as exc:  # pylint: disable=broad-except
+            put(exc)
+        finally:
+            if hasattr(items, 'close'):
+                items.close()
+            put(done)
+
+    thread = threading.Thread(target=producer, daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = buffer.get()
+            if item is done:
+                break
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def process_pool(workers: int) -> ProcessPoolExecutor:
+    """Process pool of parse workers started with spawn.
+
+    Pools are created while fetch threads are running and forking a
+    multithreaded process can deadlock the child processes.
+    """
+    return ProcessPoolExecutor(max_workers=workers,
+                               mp_context=multiprocessing.get_context('spawn'))
+
+
+def pool_map(executor: Executor, func: Callable[[Any], Any],
+             items: Iterator[Any], max_pending: int = 4) -> Iterator[Any]:
+    """Map func over items in an executor, yielding results in order.
+
+    At most `max_pending` items are submitted ahead of the consumer so raw
+    pages are not read into memory faster than they are written.
+    """
+    pending: deque = deque()
+    for item in items:
+        pending.append(executor.submit(func, item))
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class TableAccumulator:
+    """Collect pages of table dataframes and concatenate once.
+
+    Frames are kept in per-table lists and joined with a single
+    `pd.concat` per table, so accumulating n pages copies each row once
+    instead of re-copying the growing frame on every page.
+
+    Examples
+    --------
+    >>> tables = TableAccumulator()
+    >>> for table_dict in app.orders_iterator():
+    ...     tables.add(table_dict)
+    >>> orders_dict = tables.result()
+    """
+    def __init__(self) -> None:
+        self.frames: Dict[str, List[DataFrame]] = {}
+        self.pages = 0
+
+    def add(self, table_dict: Dict[str, Optional[DataFrame]]) -> None:
+        """Add a page of table dataframes."""
+        for k, v in table_dict.items():
+            if v is not None:
+                self.frames.setdefault(k, []).append(v)
+        self.pages += 1
+
+    @property
+    def rows(self) -> int:
+        """Rows of the largest table collected."""
+        return max((sum(len(df.index) for df in dfs)
+                    for dfs in self.frames.values()), default=0)
+
+    def result(self, dedupe: bool = False) -> Dict[str, DataFrame]:
+        """Concatenate collected pages into one dataframe per table.
+
+        With dedupe, rows repeated across pages are dropped on the table
+        merge columns, keeping the latest, as a MERGE source cannot match
+        a row twice.
+        """
+        table_dict = {}
+        for k, dfs in self.frames.items():
+            if len(dfs) == 1:
+                table_dict[k] = dfs[0]
+                continue
+            df = pd.concat(dfs, axis=0, ignore_index=True)
+            merge_cols = MergeDict.get(k, {}).get('merge_cols')
+            if dedupe and merge_cols and set(merge_cols).issubset(df.columns):
+                df = df.drop_duplicates(subset=merge_cols, keep='last',
+                                        ignore_index=True)
+            table_dict[k] = df
+        return table_dict
+
+    def clear(self) -> None:
+        """Drop collected pages."""
+        self.frames = {}
+        self.pages = 0
 
 
 def combine_dicts(dict1: Dict[str, DataFrame], dict2: Dict[str, DataFrame]
                   ) -> Dict[str, DataFrame]:
-    """Combine two dictionaries."""
+    """Combine two dictionaries.
+
+    Use TableAccumulator to combine many pages, this copies dict1 on
+    every call.
+    """
     for k, v in dict2.items():
         if dict1.get(k) is None:
             dict1[k] = v.copy()
@@ -1,24 +1,29 @@
 """Updated SQL Server Database."""
-import json
 import re
+import time
 import logging
 import calendar
-from typing import Union, Optional
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, Union, Optional
 from configparser import SectionProxy
 from datetime import date
 from datetime import timedelta as td
+from decimal import Decimal, InvalidOperation
 from dateutil import parser
-from pandas import DataFrame
+import numpy as np
+from pandas import DataFrame, Series, isna
 
 logger = logging.getLogger('pyshopify')
 logger.setLevel(logging.DEBUG)
 try:
     from sqlalchemy import create_engine, MetaData, Table, Column, schema, text
     from sqlalchemy.dialects.mysql import insert
+    from sqlalchemy.dialects.mssql import MONEY, SMALLMONEY
     import sqlalchemy as sa
     from sqlalchemy.engine import Engine, URL
     from pyshopify.vars import merge_str, MergeDict
     from pyshopify.db_model import DBModel
+    DECIMAL_TYPES = (sa.Numeric, MONEY, SMALLMONEY)
 except ImportError as e:
     logger.debug("Error importing SQLAlchemy: %", e)
     create_engine = None
@@ -29,6 +34,7 @@ except ImportError as e:
     MergeDict = None  # type: ignore
     Column = None
     URL = None
+    DECIMAL_TYPES = ()
 
 SUPPORTED_DIALECTS = ['mysql', 'mssql', 'mariadb']
 MYSQL_SYNONYMS = ['mysql', 'mariadb']
@@ -305,8 +311,13 @@ def get_engine(sql_conf: Union[SectionProxy, dict]) -> Engine:
     ...     'db_pass': 'password',
     ...     'windows_auth': False,
     ...     'connection_query': {'driver': 'ODBC Driver 17 for SQL Server'},
+    ...     'fast_executemany': False,
     ... }
     Connection_query is optional for MSSQL, the ODBC driver on the system will be used
+    fast_executemany can be enabled for mssql+pyodbc to send executemany
+    parameters in bulk instead of row by row, it is off by default because
+    pyodbc sends NVARCHAR(max) columns (tags, notes, body_html) in bulk
+    mode as fixed size buffers which can truncate or fail on large values
     """
     if create_engine is None:
         raise ImportError("Error importing SQL Server dependencies")
@@ -318,9 +329,11 @@ def get_engine(sql_conf: Union[SectionProxy, dict]) -> Engine:
     if isinstance(sql_conf, SectionProxy):
         windows_auth = sql_conf.getboolean('windows_auth', False)
         port = sql_conf.getint('port', None)
+        fast_executemany = sql_conf.getboolean('fast_executemany', False)
     elif isinstance(sql_conf, dict):
         windows_auth = sql_conf.get('windows_auth', False)
         port = sql_conf.get('port', None)
+        fast_executemany = sql_conf.get('fast_executemany', False)
 
     raw_query = sql_conf.get('connection_query')
     if raw_query is not None and isinstance(raw_query, str):
@@ -346,7 +359,10 @@ def get_engine(sql_conf: Union[SectionProxy, dict]) -> Engine:
     elif dialect in MYSQL_SYNONYMS:
         con_url = mysql_connection_string(conn_dict)
 
-    engine = create_engine(con_url, echo=True)
+    engine_args = {}
+    if dialect == 'mssql' and connector.split('+')[-1] == 'pyodbc':
+        engine_args['fast_executemany'] = fast_executemany
+    engine = create_engine(con_url, echo=True, **engine_args)
     return engine
 
 
@@ -430,7 +446,16 @@ def mssql_connection_string(sql_conf: dict) -> URL:
 
 
 class DBWriter:
-    """Instance to store DB metadata and engine."""
+    """Instance to store DB metadata and engine.
+
+    Target tables are reflected from the database the first time they are
+    written and reused for the life of the instance. Call `refresh_tables`
+    after altering tables outside of pyshopify.
+
+    Set `stage_hook` to a callable taking the table name, stage and seconds
+    to time the reflect, arrange, stage, merge and commit stages of each
+    table written by `sql_merge`.
+    """
     def __init__(self, sql_config: SectionProxy) -> None:
         self.engine: Engine = get_engine(sql_config)
         self.connector = sql_config['connector']
@@ -443,14 +468,83 @@ class DBWriter:
             self.meta = MetaData()
         self.tmp_meta: MetaData = MetaData()
         self.db: str = sql_config['database']
+        self.tables: Dict[str, Table] = {}
+        self.chunk_size: int = sql_config.getint('chunk_size', 10000)
+        self.mysql_staging: bool = sql_config.getboolean('mysql_staging', True)
+        self.stage_hook: Optional[Callable[[str, str, float], None]] = None
+
+    @contextmanager
+    def timed(self, tbl_name: str, stage: str) -> Iterator[None]:
+        """Report seconds spent in stage of table write to stage_hook."""
+        if self.stage_hook is None:
+            yield
+            return
+        start = time.perf_counter()
+        yield
+        self.stage_hook(tbl_name, stage, time.perf_counter() - start)
+
+    def get_table(self, tbl_name: str) -> Table:
+        """Get cached table, reflecting it from the database on first use."""
+        tbl = self.tables.get(tbl_name)
+        if tbl is None:
+            tbl = Table(tbl_name, self.meta, autoload_with=self.engine)
+            self.tables[tbl_name] = tbl
+        return tbl
+
+    def refresh_tables(self, tbl_name: Optional[str] = None) -> None:
+        """Drop cached table or all tables so they are reflected again."""
+        if tbl_name is None:
+            self.tables = {}
+            self.meta.clear()
+            return
+        tbl = self.tables.pop(tbl_name, None)
+        if tbl is not None:
+            self.meta.remove(tbl)
 
     @staticmethod
-    def sql_arrange(df: DataFrame, col_list: list) -> list:
-        """Arrange dataframe columns to match SQL columns."""
-        df = df.reindex(columns=col_list)
-        tbl_data = json.loads(df.to_json(
-            orient='records', date_format='iso'))
-        return tbl_data
+    def sql_values(values: Series, col: Column) -> list:
+        """Convert a dataframe column to a list of driver native values.
+
+        Dates become `datetime`, numeric columns holding money strings
+        become `Decimal` and missing values become `None`.
+        """
+        dtype = values.dtype
+        if not isinstance(dtype, np.dtype):
+            # Nullable extension arrays - Int64, boolean, string
+            return values.to_numpy(dtype=object, na_value=None).tolist()
+        if dtype.kind in 'iub':
+            return values.to_numpy().tolist()
+        if dtype.kind == 'M':
+            # datetime64[us] converts to datetime and NaT to None
+            return values.to_numpy().astype('datetime64[us]').tolist()
+        if dtype.kind == 'f':
+            arr = values.to_numpy()
+            out = arr.tolist()
+            for i in np.flatnonzero(np.isnan(arr)):
+                out[i] = None
+            return out
+        arr = values.to_numpy(dtype=object)
+        mask = isna(arr)
+        col_type = getattr(col.type, 'impl', col.type)
+        if isinstance(col_type, DECIMAL_TYPES) and not isinstance(col_type, sa.Float):
+            # Blank amounts are stored as zero in NOT NULL money columns
+            default = None if col.nullable else Decimal(0)
+            return [None if null else to_decimal(val, default)
+                    for val, null in zip(arr.tolist(), mask.tolist())]
+        out = arr.tolist()
+        for i in np.flatnonzero(mask):
+            out[i] = None
+        return out
+
+    @classmethod
+    def sql_arrange(cls, df: DataFrame,
+                    cols: sa.sql.expression.ColumnCollection) -> list:
+        """Arrange dataframe columns to match SQL columns as row dicts."""
+        keys = cols.keys()
+        df = df.reindex(columns=keys)
+        arrays = [cls.sql_values(values, col)
+                  for (_, values), col in zip(df.items(), cols)]
+        return [dict(zip(keys, row)) for row in zip(*arrays)]
 
     def sql_merge(self, data: dict, j: int = 0) -> bool:
         """Merge a dictionary of dataframes into an SQL table."""
@@ -467,24 +561,90 @@ class DBWriter:
             if self.dialect == 'mssql':
                 self.engine.execution_options(
                     schema_translate_map={None: self.schema})
-            with self.engine.begin() as conn:
-                tbl: Table = Table(k, self.meta, autoload_with=self.engine)
-                tbl_data = self.sql_arrange(v, tbl.c.keys())
+            with self.timed(k, 'reflect'):
+                tbl = self.get_table(k)
+            with self.engine.connect() as conn, conn.begin() as trans:
+                with self.timed(k, 'arrange'):
+                    tbl_data = self.sql_arrange(v, tbl.c)
                 if self.dialect == 'mssql':
-                    tmp = self.temp_table(tbl.c)
-                    tmp.create(conn)
-                    conn.execute(tmp.insert(), tbl_data)
-                    merge_qry = merge_str(self.db, self.schema, k,
-                                          tmp.c.keys(), **merge_dict)  # type: ignore
-                    conn.execute(text(merge_qry))
-                    tmp.drop(conn)
-                    self.tmp_meta.remove(tmp)
-                elif self.dialect in MYSQL_SYNONYMS:
-                    insert_qry = insert(tbl).values(tbl_data)
-                    merge_qry = insert_qry.on_duplicate_key_update(insert_qry.inserted)
-                    conn.execute(merge_qry)
+                    with self.staging_table(conn, tbl.c) as tmp:
+                        with self.timed(k, 'stage'):
+                            tmp.create(conn)
+                            for i in range(0, len(tbl_data), self.chunk_size):
+                                conn.execute(tmp.insert(),
+                                             tbl_data[i:i + self.chunk_size])
+                        with self.timed(k, 'merge'):
+                            merge_qry = merge_str(self.db, self.schema, k,
+                                                  tmp.c.keys(), **merge_dict)  # type: ignore
+                            conn.execute(text(merge_qry))
+                elif self.dialect in MYSQL_SYNONYMS and not self.mysql_staging:
+                    with self.timed(k, 'merge'):
+                        insert_qry = insert(tbl).values(tbl_data)
+                        merge_qry = insert_qry.on_duplicate_key_update(insert_qry.inserted)
+                        conn.execute(merge_qry)
+                else:
+                    self.staged_merge(conn, tbl, tbl_data)
+                with self.timed(k, 'commit'):
+                    trans.commit()
         return True
 
+    def staged_merge(self, conn: sa.engine.Connection, tbl: Table,
+                     tbl_data: list) -> None:
+        """Load rows into a temporary table and upsert into tbl.
+
+        Rows are inserted into the staging table with chunked executemany,
+        which the MySQL drivers send as batched multi-row inserts below
+        max_allowed_packet, then merged with a single
+        INSERT ... SELECT ... ON DUPLICATE KEY UPDATE built by
+        `upsert_select`.
+        """
+        with self.staging_table(conn, tbl.c) as tmp:
+            with self.timed(tbl.name, 'stage'):
+                tmp.create(conn)
+                for i in range(0, len(tbl_data), self.chunk_size):
+                    conn.execute(tmp.insert(),
+                                 tbl_data[i:i + self.chunk_size])
+            with self.timed(tbl.name, 'merge'):
+                conn.execute(self.upsert_select(tbl, tmp))
+
+    def upsert_select(self, tbl: Table, tmp: Table) -> sa.sql.Insert:
+        """Build upsert of all rows of tmp into tbl."""
+        insert_qry = insert(tbl).from_select(tmp.c.keys(), tmp.select())
+        return insert_qry.on_duplicate_key_update(insert_qry.inserted)
+
+    @contextmanager
+    def staging_table(self, conn: sa.engine.Connection,
+                      cols: sa.sql.expression.ColumnCollection
+                      ) -> Iterator[Table]:
+        """Staging table of cols, created by the caller.
+
+        A table left on the pooled connection by an earlier failed merge
+        is dropped first. On exit the table is dropped and removed from
+        tmp_meta, also when staging or merging raises.
+        """
+        tmp = self.temp_table(cols)
+        try:
+            self.drop_temp_table(conn, tmp)
+            yield tmp
+        finally:
+            self.tmp_meta.remove(tmp)
+            self.drop_temp_table(conn, tmp)
+
+    def drop_temp_table(self, conn: sa.engine.Connection, tmp: Table) -> None:
+        """Drop staging table if it exists, inside the open transaction.
+
+        A plain DROP TABLE implicitly commits on MySQL & MariaDB, which
+        would end the merge transaction early, DROP TEMPORARY TABLE does not.
+        """
+        if self.dialect in MYSQL_SYNONYMS:
+            name = conn.dialect.identifier_preparer.quote(tmp.name)
+            conn.execute(text(f"DROP TEMPORARY TABLE IF EXISTS {name}"))
+        elif self.dialect == 'mssql':
+            conn.execute(text(f"IF OBJECT_ID('tempdb..{tmp.name}') IS NOT NULL "
+                              f"DROP TABLE {tmp.name}"))
+        else:
+            tmp.drop(conn, checkfirst=True)
+
     def temp_table(self, cols: sa.sql.expression.ColumnCollection) -> Table:
         """Create temporary table based on dialect"""
         new_cols = [Column(col.name, col.type) for col in cols]
@@ -496,6 +656,16 @@ class DBWriter:
             return Table(tbl_name, self.tmp_meta, *new_cols, prefixes=['TEMPORARY'])
 
 
+def to_decimal(val, default: Optional[Decimal] = None) -> Optional[Decimal]:
+    """Convert money string to Decimal, blank or invalid values to default."""
+    if isinstance(val, Decimal):
+        return val
+    try:
+        return Decimal(str(val))
+    except InvalidOperation:
+        return default
+
+
 def date_row_builder(start_str) -> list:
     """Build rows for DateDimension table."""
     try:
@@ -0,0 +1,87 @@
+"""Persisted sync state for incremental pulls."""
+import json
+import logging
+import pathlib
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from dateutil import parser
+
+logger = logging.getLogger('pyshopify')
+
+
+class SyncState:
+    """Store updated_at high-water marks per endpoint in a JSON file.
+
+    Marks seen during a run are held as pending and only written to the
+    state file when `commit` is called after the endpoint is fully
+    processed, so an interrupted run is repeated on the next run.
+
+    Parameters
+    ----------
+    state_file: str
+        absolute or relative path of the JSON state file
+
+    Examples
+    --------
+    >>> state = SyncState('sync_state.json')
+    >>> state.track('orders', [{'updated_at': '2022-07-01T10:00:00-04:00'}])
+    >>> state.commit('orders')
+    >>> state.get('orders')
+    '2022-07-01T10:00:00-04:00'
+    """
+    def __init__(self, state_file: str = 'sync_state.json') -> None:
+        path_obj = pathlib.Path(state_file)
+        if path_obj.is_absolute():
+            self.state_file = path_obj
+        else:
+            self.state_file = pathlib.Path.cwd().joinpath(state_file)
+        self.marks: Dict[str, str] = {}
+        self._pending: Dict[str, datetime] = {}
+        self._lock = threading.Lock()
+        if self.state_file.is_file():
+            with open(self.state_file, 'r', encoding='utf-8') as state_fh:
+                self.marks = json.load(state_fh)
+
+    def get(self, endpoint: str) -> Optional[str]:
+        """Get committed high-water mark for endpoint."""
+        return self.marks.get(endpoint)
+
+    def track(self, endpoint: str, items: Optional[List[dict]]) -> None:
+        """Track latest updated_at from API response items."""
+        if not items:
+            return
+        dates = [parser.isoparse(item['updated_at']) for item in items
+                 if item.get('updated_at')]
+        if len(dates) == 0:
+            return
+        latest = max(dates)
+        with self._lock:
+            current = self._pending.get(endpoint)
+            if current is None or latest > current:
+                self._pending[endpoint] = latest
+
+    def commit(self, endpoint: str) -> None:
+        """Persist pending high-water mark for endpoint."""
+        with self._lock:
+            latest = self._pending.pop(endpoint, None)
+            if latest is None:
+                return
+            self.marks[endpoint] = latest.isoformat()
+            tmp_file = self.state_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as state_fh:
+                json.dump(self.marks, state_fh, indent=2)
+            tmp_file.replace(self.state_file)
+        logger.debug("%s synced through %s", endpoint, self.marks[endpoint])
+
+    def reset(self, endpoint: Optional[str] = None) -> None:
+        """Clear high-water mark for endpoint or all endpoints."""
+        with self._lock:
+            if endpoint is None:
+                self.marks = {}
+                self._pending = {}
+            else:
+                self.marks.pop(endpoint, None)
+                self._pending.pop(endpoint, None)
+            with open(self.state_file, 'w', encoding='utf-8') as state_fh:
+                json.dump(self.marks, state_fh, indent=2)
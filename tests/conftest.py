@@ -0,0 +1,43 @@
+"""Shared fixtures, API calls are served by the local mock server."""
+import pytest
+from pyshopify.mock_server import MockShopifyServer, MockStore
+from pyshopify.runner import ShopifyApp
+
+
+@pytest.fixture(scope='session')
+def mock_server():
+    """Mock Admin API with 600 orders in the first week of 2022."""
+    store = MockStore(orders=600, customers=100, products=20, locations=2,
+                      start='2022-01-01', end='2022-01-07T23:59:59')
+    with MockShopifyServer(store, bucket_size=0) as server:
+        yield server
+
+
+@pytest.fixture
+def make_app(mock_server, tmp_path):
+    """Factory of ShopifyApp instances pointed at the mock server."""
+    def factory(shopify=None, sql=None, server=None):
+        server = server or mock_server
+        config = {
+            'shopify': {
+                'shop_url': server.url,
+                'store_name': f'test-{server.server_port}',
+                'access_token': 'token',
+                'start': '2022-01-01T00:00:00+00:00',
+                'end': '2022-01-07T23:59:59+00:00',
+                'state_file': str(tmp_path / 'sync_state.json'),
+                **(shopify or {}),
+            },
+            'sql': {
+                'connector': 'mysql+pymysql',
+                'server': 'localhost',
+                'database': 'shop',
+                'db_user': 'user',
+                'db_pass': 'pass',
+                **(sql or {}),
+            },
+            'csv': {'filepath': str(tmp_path / 'csv')},
+        }
+        return ShopifyApp(config_dir=str(tmp_path / 'none.ini'),
+                          config_dict=config)
+    return factory
@@ -0,0 +1,57 @@
+"""Page accumulation for batched SQL writes."""
+import pandas as pd
+from pandas.testing import assert_frame_equal
+from pyshopify.runner import TableAccumulator
+
+
+def page(ids, status, codes=None):
+    table_dict = {'orders': pd.DataFrame({'id': ids, 'status': status})}
+    if codes is not None:
+        table_dict['discount_codes'] = pd.DataFrame(
+            {'order_id': ids, 'code': codes, 'amount': status})
+    return table_dict
+
+
+def test_result_concatenates_pages():
+    tables = TableAccumulator()
+    tables.add(page([1, 2], ['a', 'a']))
+    tables.add({**page([3], ['a']), 'refunds': None})
+    assert tables.pages == 2
+    assert tables.rows == 3
+    result = tables.result()
+    assert list(result) == ['orders']
+    assert_frame_equal(result['orders'], page([1, 2, 3], ['a'] * 3)['orders'])
+
+
+def test_dedupe_keeps_latest_row_on_merge_cols():
+    tables = TableAccumulator()
+    tables.add(page([1, 2], ['old', 'old'], codes=['X', 'Y']))
+    tables.add(page([2, 3], ['new', 'new'], codes=['Y', 'Z']))
+    tables.add(page([1], ['newer'], codes=['W']))
+
+    assert len(tables.result()['orders']) == 5
+    result = tables.result(dedupe=True)
+    assert_frame_equal(result['orders'],
+                       page([2, 3, 1], ['new', 'new', 'newer'])['orders'])
+    # Compound merge columns, order 1 has two distinct codes
+    codes = result['discount_codes']
+    assert list(zip(codes.order_id, codes.code, codes.amount)) == [
+        (1, 'X', 'old'), (2, 'Y', 'new'), (3, 'Z', 'new'), (1, 'W', 'newer')]
+
+
+
+def test_batch_pages_merges_several_pages(make_app, monkeypatch):
+    app = make_app({'items_per_page': 100}, sql={'batch_pages': 4})
+    merged = []
+    monkeypatch.setattr(app.db_writer, 'sql_merge',
+                        lambda data, j=0: merged.append(len(data['orders'])))
+    app.orders_writer(write_sql=True)
+    assert merged == [400, 200]
+
+
+def test_clear():
+    tables = TableAccumulator()
+    tables.add(page([1], ['a']))
+    tables.clear()
+    assert tables.pages == 0 and tables.rows == 0
+    assert tables.result() == {}
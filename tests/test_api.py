@@ -0,0 +1,120 @@
+"""Rate limiter and API call retries."""
+import asyncio
+import configparser
+import pytest
+import requests
+from requests.utils import CaseInsensitiveDict
+from pyshopify import api
+from pyshopify.api import RateLimiter, api_call, async_api_call
+from pyshopify.cassette import ReplayClient, AsyncReplayClient
+from pyshopify.mock_server import MockShopifyServer, MockStore
+
+
+@pytest.fixture
+def shop_conf(request):
+    config = configparser.ConfigParser()
+    config.read_dict({'shopify': {'store_name': request.node.name,
+                                  'access_token': 'token',
+                                  'bucket_margin': 0}})
+    return config['shopify']
+
+
+@pytest.fixture
+def no_sleep(monkeypatch):
+    """Skip limiter waits, returns list of requested sleeps."""
+    sleeps = []
+    monkeypatch.setattr(api.time, 'sleep', sleeps.append)
+    return sleeps
+
+
+def test_limiter_paces_calls_past_margin(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(api.time, 'monotonic', lambda: now[0])
+    limiter = RateLimiter(bucket_size=4, leak_rate=2.0, margin=1)
+    waits = [limiter._reserve() for _ in range(5)]
+    assert waits[:3] == [0.0, 0.0, 0.0]
+    assert waits[3] == pytest.approx(0.5)
+    assert waits[4] == pytest.approx(1.0)
+    now[0] += 10
+    assert limiter._reserve() == 0.0
+
+
+def test_limiter_update_from_header(monkeypatch):
+    monkeypatch.setattr(api.time, 'monotonic', lambda: 100.0)
+    limiter = RateLimiter(bucket_size=40, leak_rate=2.0)
+    limiter.update(CaseInsensitiveDict(
+        {'X-Shopify-Shop-Api-Call-Limit': '70/80'}))
+    assert limiter.bucket_size == 80
+    assert limiter.level == 70.0
+    limiter.update(CaseInsensitiveDict(
+        {'X-Shopify-Shop-Api-Call-Limit': 'bad'}))
+    assert limiter.level == 70.0
+
+
+def test_limiter_penalize_pauses(monkeypatch):
+    monkeypatch.setattr(api.time, 'monotonic', lambda: 100.0)
+    limiter = RateLimiter(bucket_size=40, leak_rate=2.0, margin=0)
+    limiter.penalize(3.0)
+    assert limiter.level == 40.0
+    assert limiter._reserve() >= 3.0
+
+
+def test_api_call_returns_page(mock_server, shop_conf, no_sleep):
+    url = f"{mock_server.url}/admin/api/2022-07/orders.json"
+    resp = api_call(url, shop_conf, init_params={'limit': 1}, page=False)
+    assert resp.status_code == 200
+    assert len(resp.json()['orders']) == 1
+
+
+def test_mock_server_throttling_raises(shop_conf, no_sleep):
+    """Server bucket that never leaks answers every later call with 429."""
+    with MockShopifyServer(MockStore(orders=10), bucket_size=1,
+                           leak_rate=1e-9) as server:
+        url = f"{server.url}/admin/api/2022-07/orders.json"
+        assert api_call(url, shop_conf, page=False).status_code == 200
+        with pytest.raises(requests.HTTPError) as err:
+            api_call(url, shop_conf, page=False)
+    assert err.value.response.status_code == 429
+
+
+def test_mock_server_call_limit_header(shop_conf, no_sleep):
+    """Unthrottled server sends no call limit for the client to pace on."""
+    with MockShopifyServer(MockStore(orders=10), bucket_size=0) as server:
+        url = f"{server.url}/admin/api/2022-07/orders.json"
+        for _ in range(45):
+            resp = api_call(url, shop_conf, page=False)
+            assert 'X-Shopify-Shop-Api-Call-Limit' not in resp.headers
+    with MockShopifyServer(MockStore(orders=10), bucket_size=40) as server:
+        url = f"{server.url}/admin/api/2022-07/orders.json"
+        resp = api_call(url, shop_conf, page=False)
+        assert resp.headers['X-Shopify-Shop-Api-Call-Limit'] == '1/40'
+
+
+def test_api_call_raises_when_retries_exhausted(tmp_path, shop_conf,
+                                                no_sleep):
+    client = ReplayClient(str(tmp_path), rate_429=1.0, retry_after=0.5)
+    with pytest.raises(requests.HTTPError, match='429'):
+        api_call('https://x.myshopify.com/admin/api/2022-07/orders.json',
+                 shop_conf, client=client)
+    assert len(no_sleep) >= 9
+
+
+def test_async_api_call_raises_when_retries_exhausted(tmp_path, shop_conf,
+                                                      monkeypatch):
+    async def no_wait(self):
+        return None
+    monkeypatch.setattr(RateLimiter, 'acquire_async', no_wait)
+    client = AsyncReplayClient(str(tmp_path), rate_429=1.0)
+    with pytest.raises(requests.HTTPError, match='429'):
+        asyncio.run(async_api_call(
+            'https://x.myshopify.com/admin/api/2022-07/orders.json',
+            shop_conf, client))
+
+
+def test_throttled_pull_is_not_truncated(make_app, tmp_path, no_sleep):
+    """A pull that stays throttled raises instead of ending early."""
+    app = make_app({'incremental': True})
+    app.client = ReplayClient(str(tmp_path), rate_429=1.0)
+    with pytest.raises(requests.HTTPError):
+        app.get_full_orders_df()
+    assert app.sync_state.get('orders') is None
@@ -0,0 +1,40 @@
+"""Recording and replaying API responses."""
+import asyncio
+import configparser
+import pytest
+from pyshopify.cassette import (build_async_client, AsyncRecordingClient,
+                                AsyncReplayClient)
+
+
+async def collect_orders(app):
+    pages = [page async for page in app.orders_iterator_async()]
+    await app.close_async()
+    return pages
+
+
+def test_build_async_client_modes(tmp_path):
+    config = configparser.ConfigParser()
+    config.read_dict({'shopify': {'cassette_mode': 'record'}})
+    with pytest.raises(ValueError):
+        build_async_client(config['shopify'])
+    config['shopify']['cassette'] = str(tmp_path)
+    assert isinstance(build_async_client(config['shopify']),
+                      AsyncRecordingClient)
+    config['shopify']['cassette_mode'] = 'replay'
+    assert isinstance(build_async_client(config['shopify']),
+                      AsyncReplayClient)
+
+
+def test_async_record_then_replay(make_app, tmp_path):
+    cassette = str(tmp_path / 'cassette')
+    app = make_app({'cassette_mode': 'record', 'cassette': cassette})
+    recorded = asyncio.run(collect_orders(app))
+    assert sum(len(page['orders']) for page in recorded) == 600
+    assert len(list((tmp_path / 'cassette').glob('*.json'))) == len(recorded)
+
+    replay = make_app({'cassette_mode': 'replay', 'cassette': cassette,
+                       'shop_url': 'http://127.0.0.1:9'})
+    replayed = asyncio.run(collect_orders(replay))
+    assert len(replayed) == len(recorded)
+    for rec_page, rep_page in zip(recorded, replayed):
+        assert rec_page['orders'].equals(rep_page['orders'])
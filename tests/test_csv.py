@@ -0,0 +1,61 @@
+"""CSV sink headers and modes."""
+import configparser
+import pandas as pd
+import pytest
+from pyshopify.csv_out import CSVSink, csv_send
+from pyshopify.mock_server import MockShopifyServer, MockStore
+
+
+@pytest.fixture
+def csv_config(tmp_path):
+    config = configparser.ConfigParser()
+    config.read_dict({'csv': {'filepath': str(tmp_path / 'csv')}})
+    return config['csv']
+
+
+def page(ids):
+    return {'orders': pd.DataFrame({'id': ids, 'name': [f'#{i}' for i in ids]}),
+            'refunds': None}
+
+
+def lines(csv_config):
+    path = f"{csv_config['filepath']}/orders.csv"
+    with open(path, encoding='utf-8-sig') as csv_fh:
+        return csv_fh.read().splitlines()
+
+
+def test_header_once_per_file(csv_config):
+    with CSVSink(csv_config, 'w') as sink:
+        sink.write(page([1, 2]))
+        sink.write(page([3]))
+    assert lines(csv_config) == ['id,name', '1,#1', '2,#2', '3,#3']
+
+
+def test_append_skips_header_of_existing_file(csv_config):
+    csv_send(page([1]), csv_config)
+    csv_send(page([2]), csv_config, 'a')
+    csv_send(page([3]), csv_config)
+    assert lines(csv_config) == ['id,name', '1,#1', '2,#2', '3,#3']
+    csv_send(page([4]), csv_config, 'w')
+    assert lines(csv_config) == ['id,name', '4,#4']
+
+
+def test_pages_stay_buffered(csv_config, tmp_path):
+    with CSVSink(csv_config, 'w') as sink:
+        sink.write(page([1]))
+        sink.write(page([2]))
+        # Nothing is flushed to disk until the buffer fills or closes
+        assert (tmp_path / 'csv' / 'orders.csv').stat().st_size == 0
+    assert lines(csv_config) == ['id,name', '1,#1', '2,#2']
+
+
+def test_products_writer_writes_every_page(make_app, tmp_path):
+    """Products from all 3 pages of 250 and their variants reach the csv."""
+    store = MockStore(products=600, variants=3)
+    with MockShopifyServer(store, bucket_size=0) as server:
+        make_app(server=server).products_writer(write_csv=True)
+    products = pd.read_csv(tmp_path / 'csv' / 'products.csv')
+    variants = pd.read_csv(tmp_path / 'csv' / 'variants.csv')
+    assert len(products) == 600 and products.id.is_unique
+    assert len(variants) == 1800 and variants.id.is_unique
+    assert set(variants.product_id) == set(products.id)
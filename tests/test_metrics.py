@@ -0,0 +1,132 @@
+"""Metrics collection and exporters."""
+import socket
+import configparser
+import pandas as pd
+import pytest
+from pyshopify import metrics
+from pyshopify.metrics import (Metrics, MetricsCollector, StatsDExporter,
+                               PrometheusExporter, build_exporter)
+
+
+def metrics_conf(**options):
+    config = configparser.ConfigParser()
+    config.read_dict({'metrics': options})
+    return config['metrics']
+
+
+@pytest.fixture
+def statsd():
+    exporter = StatsDExporter('localhost', 8125, prefix='shop')
+    yield exporter
+    exporter.close()
+
+
+def test_collector_groups_without_page():
+    collector = MetricsCollector()
+    app_metrics = Metrics([collector])
+    pages = {'orders': pd.DataFrame({'id': [1, 2]}), 'refunds': None}
+    app_metrics.page('orders', 1, pages, 0.5)
+    app_metrics.page('orders', 2, {'orders': pd.DataFrame({'id': [3]})}, 1.5)
+    app_metrics.sql_stage('orders', 'merge', 0.25)
+
+    summary = collector.summary()
+    assert list(summary.metric) == ['parse_seconds', 'rows', 'sql_seconds']
+    parse, rows, sql = summary.to_dict('records')
+    assert parse['tags'] == 'endpoint=orders'
+    assert (parse['count'], parse['total'], parse['mean'], parse['max']) == (
+        2, 2.0, 1.0, 1.5)
+    assert rows['tags'] == 'endpoint=orders,table=orders'
+    assert (rows['count'], rows['total']) == (2, 3)
+    assert sql['tags'] == 'stage=merge,table=orders'
+    collector.clear()
+    assert collector.summary().empty
+
+
+def test_callback_errors_are_ignored():
+    seen = []
+
+    def broken(name, value, tags):
+        raise ValueError('bad callback')
+
+    app_metrics = Metrics([broken, lambda *args: seen.append(args)])
+    app_metrics.emit('rows', 3, table='orders')
+    assert seen == [('rows', 3, {'table': 'orders'})]
+
+
+def test_statsd_format(statsd):
+    assert statsd.format('parse_seconds', 0.0125,
+                         {'endpoint': 'orders', 'page': 4}) == (
+        'shop.parse_seconds:12.500|ms|#endpoint:orders')
+    assert statsd.format('bucket_fill', 0.5, {}) == 'shop.bucket_fill:0.5|g'
+    assert statsd.format('rows', 250, {'endpoint': 'orders', 'page': 1,
+                                       'table': 'line_items'}) == (
+        'shop.rows:250|c|#endpoint:orders,table:line_items')
+    statsd.tags = False
+    assert statsd.format('rows', 250, {'table': 'orders'}) == 'shop.rows:250|c'
+
+
+def test_statsd_sends_datagram():
+    with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+        sock.bind(('127.0.0.1', 0))
+        sock.settimeout(5)
+        exporter = StatsDExporter('127.0.0.1', sock.getsockname()[1])
+        try:
+            exporter('http_throttled', 1, {'endpoint': 'orders'})
+            assert sock.recv(1024) == (
+                b'pyshopify.http_throttled:1|c|#endpoint:orders')
+        finally:
+            exporter.close()
+
+
+def test_build_exporter():
+    assert build_exporter(metrics_conf()) is None
+    assert build_exporter(metrics_conf(exporter='none')) is None
+    exporter = build_exporter(metrics_conf(exporter='StatsD', prefix='shop',
+                                           statsd_host='127.0.0.1',
+                                           statsd_port='9125'))
+    try:
+        assert isinstance(exporter, StatsDExporter)
+        assert exporter.address == ('127.0.0.1', 9125)
+        assert exporter.prefix == 'shop'
+    finally:
+        exporter.close()
+
+
+def test_build_prometheus_exporter_requires_client(monkeypatch):
+    monkeypatch.setattr(metrics, 'prometheus_client', None)
+    monkeypatch.setattr(metrics, '_prometheus', None)
+    with pytest.raises(ImportError):
+        build_exporter(metrics_conf(exporter='prometheus'))
+
+
+def test_prometheus_labels_drop_page():
+    prometheus_client = pytest.importorskip('prometheus_client')
+    registry = prometheus_client.CollectorRegistry()
+    exporter = PrometheusExporter(prefix='shop', registry=registry)
+    exporter('rows', 250, {'endpoint': 'orders', 'page': 1,
+                           'table': 'line_items'})
+    exporter('rows', 50, {'endpoint': 'orders', 'page': 2,
+                          'table': 'line_items'})
+    exporter('bucket_fill', 0.75, {'endpoint': 'orders', 'page': 2})
+    exporter('http_seconds', 0.2, {'endpoint': 'orders', 'status': 200,
+                                   'page': 2})
+    exporter('unknown', 1, {})
+    assert registry.get_sample_value(
+        'shop_rows_total', {'endpoint': 'orders', 'table': 'line_items'}) == 300
+    assert registry.get_sample_value('shop_bucket_fill') == 0.75
+    assert registry.get_sample_value(
+        'shop_http_seconds_count', {'endpoint': 'orders', 'status': '200'}) == 1
+    for metric in registry.collect():
+        for sample in metric.samples:
+            assert 'page' not in sample.labels
+
+
+def test_app_metrics(make_app):
+    app = make_app()
+    collector = MetricsCollector()
+    app.metrics.add_callback(collector)
+    app.get_full_orders_df()
+    summary = collector.summary().set_index(['metric', 'tags'])
+    assert summary.loc[('rows', 'endpoint=orders,table=orders'), 'total'] == 600
+    assert summary.loc[('http_seconds', 'endpoint=orders,status=200'),
+                       'count'] >= 3
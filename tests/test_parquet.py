@@ -0,0 +1,43 @@
+"""Parquet sink schemas and round trips."""
+import configparser
+from decimal import Decimal
+import pandas as pd
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+pq = pytest.importorskip('pyarrow.parquet')
+from pyshopify.parquet_out import ParquetSink, table_schema  # noqa: E402
+
+
+@pytest.fixture
+def parquet_config(tmp_path):
+    config = configparser.ConfigParser()
+    config.read_dict({'parquet': {'filepath': str(tmp_path / 'parquet')}})
+    return config['parquet']
+
+
+def test_money_columns_match_sql_type():
+    schema = table_schema('variants')
+    assert schema.field('price').type == pa.decimal128(10, 4)
+    assert schema.field('compare_at_price').type == pa.decimal128(10, 4)
+    assert schema.field('weight').type == pa.float64()
+
+
+def test_money_round_trip(parquet_config, tmp_path):
+    """Money strings are read back as the exact decimal amounts."""
+    page = pd.DataFrame({
+        'id': [1, 2, 3], 'order_id': [10, 10, 11],
+        'processed_at': pd.to_datetime(['2022-01-01'] * 3),
+        'variant_id': [5, 6, 5], 'quantity': [1, 2, 1],
+        'price': ['19.99', '0.10', None], 'product_id': [7, 8, 7],
+        'total_discount': ['1.005', '', '2'], 'name': ['Hat', 'Cap', 'Hat']})
+    with ParquetSink(parquet_config) as sink:
+        sink.write({'line_items': page.iloc[:2]})
+        sink.write({'line_items': page.iloc[2:]})
+    table = pq.read_table(tmp_path / 'parquet' / 'line_items.parquet')
+    assert table.schema.field('price').type == pa.decimal128(10, 4)
+    assert table.column('id').to_pylist() == [1, 2, 3]
+    assert table.column('price').to_pylist() == [
+        Decimal('19.99'), Decimal('0.10'), None]
+    assert table.column('total_discount').to_pylist() == [
+        Decimal('1.005'), None, Decimal('2')]
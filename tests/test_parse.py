@@ -0,0 +1,75 @@
+"""Single pass order parsing against the per-table json_normalize parsers."""
+import numpy as np
+import pandas as pd
+import pytest
+from pandas.testing import assert_frame_equal
+from pyshopify.mock_server import MockStore
+from pyshopify.return_parse import (
+    DFWork, pandas_work, iso_to_utc, orders_work, ship_lines_work,
+    refunds_work, refund_line_items_work, adjustments_works,
+    discount_app_work, discount_code_work, line_item_work, order_attr_work)
+
+PAGE_SIZE = 50
+
+
+def baseline_work(json_list: dict) -> dict:
+    """Orders tables built one json_normalize call per table."""
+    orders, prices = orders_work(json_list)
+    tables = {'orders': orders, 'order_prices': prices,
+              'ship_lines': ship_lines_work(json_list),
+              'refunds': refunds_work(json_list),
+              'refund_line_item': refund_line_items_work(json_list),
+              'adjustments': adjustments_works(json_list),
+              'discount_apps': discount_app_work(json_list),
+              'discount_codes': discount_code_work(json_list),
+              'line_items': line_item_work(json_list),
+              'order_attr': order_attr_work(json_list)}
+    return {tbl: df for tbl, df in tables.items() if df is not None}
+
+
+@pytest.mark.parametrize('profile', [
+    {'line_items': (1, 1), 'refund_rate': 0.0, 'discount_rate': 0.0},
+    {'line_items': (5, 20), 'refund_rate': 0.5, 'discount_rate': 0.8},
+])
+def test_pandas_work_matches_baseline(profile):
+    store = MockStore(orders=PAGE_SIZE, seed=1, **profile)
+    page = {'orders': [store.order(i) for i in range(PAGE_SIZE)]}
+    expected = baseline_work(page)
+    result = pandas_work(page)
+    assert sorted(result) == sorted(expected)
+    for tbl, df in expected.items():
+        assert_frame_equal(result[tbl].reset_index(drop=True),
+                           df.reset_index(drop=True), obj=tbl)
+
+
+def test_pandas_work_empty_page():
+    assert pandas_work({'orders': []}) == {}
+
+
+def test_parse_dates_matches_to_datetime():
+    values = np.array(['2022-07-01T10:00:00-04:00', '2022-07-01T10:00:00Z',
+                       '2022-12-31T23:30:00+05:30', '2022-07-01T10:00:00-04:00',
+                       '2022-07-01', None, 'not a date', np.nan], dtype=object)
+    expected = pd.to_datetime(pd.Series(values), errors='coerce', utc=True)
+    expected = expected.dt.tz_localize(None).to_numpy()
+    DFWork.date_cache.clear()
+    np.testing.assert_array_equal(iso_to_utc(values), expected)
+    np.testing.assert_array_equal(DFWork.parse_dates(values), expected)
+    # Second call is served from the cache
+    np.testing.assert_array_equal(DFWork.parse_dates(values), expected)
+
+
+def sorted_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """Rows in a fixed order so pulls that interleave pages compare equal."""
+    return df.sort_values(list(df.columns)).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('window_days', [0, 1])
+def test_parse_workers_match_in_process(make_app, window_days):
+    """Pages parsed in spawned worker processes give the in-process frames."""
+    shop = {'window_days': window_days, 'items_per_page': 100}
+    local = make_app(shop).get_full_orders_df()
+    pooled = make_app({**shop, 'parse_workers': 2}).get_full_orders_df()
+    assert local.keys() == pooled.keys()
+    for table, df in local.items():
+        assert_frame_equal(sorted_frame(pooled[table]), sorted_frame(df))
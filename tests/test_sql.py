@@ -0,0 +1,134 @@
+"""DBWriter statements, built without a database server."""
+import configparser
+from datetime import datetime
+from decimal import Decimal
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import create_mock_engine
+from pyshopify.db_model import Base
+from pyshopify.sql import DBWriter
+
+
+def recording_connection(writer, fail_on=None, url=None):
+    """Mock connection recording SQL, raises on statements starting fail_on."""
+    statements = []
+
+    def execute(stmt, *args, **kwargs):
+        sql = ' '.join(str(stmt.compile(dialect=conn.dialect)).split())
+        statements.append(sql)
+        if fail_on is not None and sql.startswith(fail_on):
+            raise RuntimeError('lost connection')
+
+    conn = create_mock_engine(url or writer.engine.url, execute)
+    return conn, statements
+
+
+@pytest.fixture
+def mysql_writer():
+    config = configparser.ConfigParser()
+    config.read_dict({'sql': {'connector': 'mysql+pymysql',
+                              'server': 'localhost', 'database': 'shop',
+                              'db_user': 'user', 'db_pass': 'pass'}})
+    return DBWriter(config['sql'])
+
+
+def test_mysql_drops_temporary_table(mysql_writer):
+    tmp = mysql_writer.temp_table(Base.metadata.tables['orders'].c)
+    conn, statements = recording_connection(mysql_writer)
+    mysql_writer.drop_temp_table(conn, tmp)
+    assert statements == ['DROP TEMPORARY TABLE IF EXISTS tmp']
+
+
+def test_staged_merge_statements(mysql_writer):
+    tbl = Base.metadata.tables['inventory_locations']
+    conn, statements = recording_connection(mysql_writer)
+    mysql_writer.staged_merge(conn, tbl, [{'id': 1}])
+    assert statements[0] == 'DROP TEMPORARY TABLE IF EXISTS tmp'
+    assert statements[1].startswith('CREATE TEMPORARY TABLE tmp')
+    assert statements[2].startswith('INSERT INTO tmp')
+    assert 'ON DUPLICATE KEY UPDATE' in statements[3]
+    assert statements[4:] == ['DROP TEMPORARY TABLE IF EXISTS tmp']
+    assert 'tmp' not in mysql_writer.tmp_meta.tables
+
+
+def test_failed_staged_merge_cleans_up(mysql_writer):
+    tbl = Base.metadata.tables['inventory_locations']
+    conn, statements = recording_connection(mysql_writer,
+                                            fail_on='INSERT INTO inventory')
+    with pytest.raises(RuntimeError):
+        mysql_writer.staged_merge(conn, tbl, [{'id': 1}])
+    assert statements[-1] == 'DROP TEMPORARY TABLE IF EXISTS tmp'
+    assert 'tmp' not in mysql_writer.tmp_meta.tables
+
+    # The next merge on the same writer defines the staging table again
+    conn, statements = recording_connection(mysql_writer)
+    mysql_writer.staged_merge(conn, tbl, [{'id': 2}])
+    assert len(statements) == 5
+
+
+def test_mssql_staging_table_cleans_up(mysql_writer):
+    # MSSQL drivers are not installed, reuse the writer with its dialect
+    mysql_writer.dialect = 'mssql'
+    conn, statements = recording_connection(mysql_writer,
+                                            url='mssql+pyodbc://')
+    drop = "IF OBJECT_ID('tempdb..#tmp') IS NOT NULL DROP TABLE #tmp"
+    with pytest.raises(RuntimeError):
+        with mysql_writer.staging_table(
+                conn, Base.metadata.tables['orders'].c) as tmp:
+            assert tmp.name == '#tmp'
+            raise RuntimeError('merge failed')
+    assert statements == [drop, drop]
+    assert '#tmp' not in mysql_writer.tmp_meta.tables
+
+
+def test_sql_values_money_to_decimal():
+    col = Base.metadata.tables['variants'].c.price
+    values = pd.Series(['19.99', '0.10', Decimal('5.5')])
+    assert DBWriter.sql_values(values, col) == [
+        Decimal('19.99'), Decimal('0.10'), Decimal('5.5')]
+
+
+def test_sql_values_blank_money_defaults():
+    """Blank amounts are zero in NOT NULL money columns, else NULL."""
+    values = pd.Series(['1.25', '', None, np.nan])
+    not_null = Base.metadata.tables['line_items'].c.price
+    nullable = Base.metadata.tables['variants'].c.compare_at_price
+    assert DBWriter.sql_values(values, not_null) == [
+        Decimal('1.25'), Decimal(0), None, None]
+    assert DBWriter.sql_values(values, nullable) == [
+        Decimal('1.25'), None, None, None]
+
+
+def test_sql_values_missing_to_null():
+    cols = Base.metadata.tables['variants'].c
+    dates = pd.Series(pd.to_datetime(['2022-01-01 12:30:00', None]))
+    assert DBWriter.sql_values(dates, cols.created_at) == [
+        datetime(2022, 1, 1, 12, 30), None]
+    floats = pd.Series([1.5, np.nan])
+    assert DBWriter.sql_values(floats, cols.weight) == [1.5, None]
+    text = pd.Series(['red', np.nan, None])
+    assert DBWriter.sql_values(text, cols.option1) == ['red', None, None]
+    ints = pd.Series([3, None], dtype='Int64')
+    assert DBWriter.sql_values(ints, cols.grams) == [3, None]
+
+
+def test_sql_values_native_types():
+    cols = Base.metadata.tables['variants'].c
+    ints = DBWriter.sql_values(pd.Series([1, 2], dtype='int64'), cols.id)
+    flags = DBWriter.sql_values(pd.Series([True, False]),
+                                cols.requires_shipping)
+    assert ints == [1, 2] and flags == [True, False]
+    assert all(type(val) is int for val in ints)
+    assert all(type(val) is bool for val in flags)
+
+
+def test_sql_arrange_orders_rows_by_table_columns():
+    cols = Base.metadata.tables['line_items'].c
+    df = pd.DataFrame({'title': ['Hat', 'Cap'], 'id': [2, 1],
+                       'price': ['9.50', ''], 'extra': ['x', 'y']})
+    rows = DBWriter.sql_arrange(df, cols)
+    assert [list(row) for row in rows] == [cols.keys(), cols.keys()]
+    assert rows[0]['id'] == 2 and rows[1]['title'] == 'Cap'
+    assert [row['price'] for row in rows] == [Decimal('9.50'), Decimal(0)]
+    assert rows[0]['order_id'] is None and rows[0]['sku'] is None
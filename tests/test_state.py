@@ -0,0 +1,144 @@
+"""Incremental sync state and when it is committed."""
+import json
+import time
+import pytest
+from pyshopify.state import SyncState
+
+
+def test_track_commit_reset(tmp_path):
+    state_file = tmp_path / 'state.json'
+    state = SyncState(str(state_file))
+    state.track('orders', [{'updated_at': '2022-07-01T10:00:00-04:00'},
+                           {'updated_at': '2022-07-02T10:00:00-04:00'},
+                           {'id': 1}])
+    state.track('orders', [{'updated_at': '2022-06-01T10:00:00-04:00'}])
+    state.track('orders', None)
+    assert state.get('orders') is None
+    assert not state_file.exists()
+
+    state.commit('orders')
+    assert state.get('orders') == '2022-07-02T10:00:00-04:00'
+    assert json.loads(state_file.read_text()) == {
+        'orders': '2022-07-02T10:00:00-04:00'}
+    assert SyncState(str(state_file)).get('orders') == state.get('orders')
+
+    state.commit('customers')
+    assert state.get('customers') is None
+
+    state.reset('orders')
+    assert state.get('orders') is None
+    assert json.loads(state_file.read_text()) == {}
+
+
+def test_reset_drops_pending(tmp_path):
+    state = SyncState(str(tmp_path / 'state.json'))
+    state.track('products', [{'updated_at': '2022-07-01T10:00:00Z'}])
+    state.reset()
+    state.commit('products')
+    assert state.get('products') is None
+
+
+def test_inventory_levels_read_does_not_commit(make_app):
+    app = make_app({'incremental': True})
+    levels = app.get_inventory_levels()['inventory_levels']
+    assert len(levels) > 0
+    assert app.sync_state.get('inventory_levels') is None
+
+
+def test_inventory_levels_commit_after_write(make_app, monkeypatch):
+    app = make_app({'incremental': True})
+
+    def failed_merge(data, j=0):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(app.db_writer, 'sql_merge', failed_merge)
+    with pytest.raises(RuntimeError):
+        app.inventory_levels_writer(write_sql=True)
+    assert app.sync_state.get('inventory_levels') is None
+
+    written = []
+    monkeypatch.setattr(app.db_writer, 'sql_merge',
+                        lambda data, j=0: written.append(data))
+    app.inventory_levels_writer(write_sql=True)
+    assert len(written) == 1
+    assert app.sync_state.get('inventory_levels') is not None
+
+
+def test_orders_commit_after_write(make_app, monkeypatch):
+    app = make_app({'incremental': True, 'items_per_page': 100})
+    pages = []
+
+    def merge(data, j=0):
+        if len(pages) == 3:
+            raise RuntimeError('database unavailable')
+        pages.append(data)
+
+    monkeypatch.setattr(app.db_writer, 'sql_merge', merge)
+    with pytest.raises(RuntimeError):
+        app.orders_writer(write_sql=True)
+    assert app.sync_state.get('orders') is None
+    monkeypatch.setattr(app.db_writer, 'sql_merge', lambda data, j=0: True)
+    app.orders_writer(write_sql=True)
+    assert app.sync_state.get('orders') is not None
+
+
+MARK = '2022-01-05T00:00:00+00:00'
+
+
+@pytest.fixture
+def marked_app(make_app):
+    """Incremental app with marks part way through the mock store."""
+    app = make_app({'incremental': True})
+    for endpoint in ('orders', 'customers', 'products'):
+        app.sync_state.track(endpoint, [{'updated_at': MARK}])
+        app.sync_state.commit(endpoint)
+    return app
+
+
+def test_orders_read_ignores_and_keeps_mark(marked_app):
+    orders = marked_app.get_full_orders_df()['orders']
+    assert len(orders) == 600
+    assert sum(len(page['orders'])
+               for page in marked_app.orders_iterator()) == 600
+    assert marked_app.sync_state.get('orders') == MARK
+
+
+def test_customers_read_ignores_and_keeps_mark(marked_app, make_app):
+    customers = marked_app.get_full_customers_df()['customers']
+    expected = make_app().get_full_customers_df()['customers']
+    assert customers.id.tolist() == expected.id.tolist()
+    assert marked_app.sync_state.get('customers') == MARK
+
+
+def test_products_read_ignores_and_keeps_mark(marked_app):
+    products = marked_app.get_products()['products']
+    assert len(products) == 20
+    table = marked_app.inventory_table()
+    assert set(table.product_id) == set(
+        products.loc[products.status == 'active', 'id'])
+    assert marked_app.sync_state.get('products') == MARK
+
+
+def test_writer_pulls_from_mark(marked_app, monkeypatch):
+    written = []
+    monkeypatch.setattr(marked_app.db_writer, 'sql_merge',
+                        lambda data, j=0: written.append(len(data['orders'])))
+    marked_app.orders_writer(write_sql=True)
+    assert 0 < sum(written) < 600
+    assert marked_app.sync_state.get('orders') > MARK
+
+
+def test_pipelined_failed_write_does_not_commit(make_app, monkeypatch):
+    app = make_app({'incremental': True, 'pipeline': True,
+                    'items_per_page': 250})
+
+    def failed_merge(data, j=0):
+        # Let the producer finish the runner before the write fails
+        time.sleep(0.5)
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(app.db_writer, 'sql_merge', failed_merge)
+    with pytest.raises(RuntimeError):
+        app.orders_writer(write_sql=True)
+    time.sleep(0.2)
+    assert app.sync_state.get('orders') is None
@@ -0,0 +1,108 @@
+"""Date window splitting for sharded orders pulls."""
+import time
+import queue
+import threading
+from datetime import timedelta
+import pytest
+from dateutil import parser
+from pyshopify.mock_server import MockShopifyServer, MockStore
+from pyshopify.runner import date_windows
+
+
+def assert_contiguous(windows, start, end):
+    """Windows cover whole seconds from start to end without gap or overlap."""
+    bounds = [(parser.isoparse(s), parser.isoparse(e)) for s, e in windows]
+    assert bounds[0][0] == start
+    assert bounds[-1][1] == end
+    for (_, prev_end), (next_start, _) in zip(bounds, bounds[1:]):
+        assert next_start == prev_end + timedelta(seconds=1)
+    for win_start, win_end in bounds:
+        assert win_start <= win_end
+
+
+@pytest.mark.parametrize('kwargs', [{'days': 1}, {'days': 3}, {'count': 7},
+                                    {'count': 1000}])
+def test_windows_contiguous(kwargs):
+    windows = date_windows('2022-01-01T00:00:00+00:00',
+                           '2022-01-10T12:00:00+00:00', **kwargs)
+    assert len(windows) > 1
+    assert_contiguous(windows, parser.isoparse('2022-01-01T00:00:00+00:00'),
+                      parser.isoparse('2022-01-10T12:00:00+00:00'))
+
+
+def test_fractional_seconds_rounded_inward():
+    windows = date_windows('2021-12-31T00:00:00.5+00:00',
+                           '2022-01-03T00:00:00.25+00:00', days=1)
+    assert_contiguous(windows, parser.isoparse('2021-12-31T00:00:01+00:00'),
+                      parser.isoparse('2022-01-03T00:00:00+00:00'))
+
+
+def test_no_split():
+    assert date_windows('2022-01-01', '2022-01-02') == [
+        ('2022-01-01', '2022-01-02')]
+
+
+def test_sharded_pull_matches_single_pull(make_app):
+    """Hourly orders fall on window boundaries of a fractional start."""
+    store = MockStore(orders=169, start='2022-01-01', end='2022-01-08')
+    shop = {'start': '2021-12-31T00:00:00.5+00:00',
+            'end': '2022-01-08T00:00:00+00:00'}
+    with MockShopifyServer(store, bucket_size=0) as server:
+        single = make_app(shop, server=server).get_full_orders_df()['orders']
+        sharded = make_app({**shop, 'window_days': 1},
+                           server=server).get_full_orders_df()['orders']
+    assert len(single) == 169
+    assert sorted(sharded.id) == sorted(single.id)
+
+
+def test_sharded_pull_buffers_pipeline_depth(make_app, monkeypatch):
+    """Window queues are bounded and abandoning the pull stops workers."""
+    sizes = []
+    real_queue = queue.Queue
+
+    def bounded(maxsize=0):
+        sizes.append(maxsize)
+        return real_queue(maxsize)
+
+    monkeypatch.setattr(queue, 'Queue', bounded)
+    app = make_app({'window_days': 1, 'items_per_page': 5,
+                    'pipeline_depth': 2})
+    pages = app.orders_iterator()
+    next(pages)
+    pages.close()
+    assert sizes and set(sizes) == {2}
+
+    def workers():
+        return [t for t in threading.enumerate()
+                if t.name.startswith('ThreadPoolExecutor')]
+
+    for _ in range(50):
+        if not workers():
+            break
+        time.sleep(0.1)
+    assert not workers()
+
+
+def test_failed_write_stops_sharded_workers(make_app, monkeypatch):
+    """The writer closes the page iterator when a write fails."""
+    app = make_app({'window_days': 1, 'items_per_page': 5,
+                    'pipeline_depth': 1})
+
+    def failed_merge(data, j=0):
+        raise RuntimeError('database unavailable')
+
+    monkeypatch.setattr(app.db_writer, 'sql_merge', failed_merge)
+    # The held traceback keeps the page iterator referenced
+    with pytest.raises(RuntimeError) as excinfo:
+        app.orders_writer(write_sql=True)
+
+    def workers():
+        return [t for t in threading.enumerate()
+                if t.name.startswith('ThreadPoolExecutor')]
+
+    for _ in range(50):
+        if not workers():
+            break
+        time.sleep(0.1)
+    assert not workers()
+    assert excinfo.value.args == ('database unavailable',)